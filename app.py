@@ -5,21 +5,678 @@ An interactive tool that explains hockey concepts using analogies from
 Soccer (Premier League), NBA, NFL, and MLB.
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, send_file, redirect, g, has_request_context
+import functools
+import gzip
+import hashlib
+import hmac
+import mmap
+import os
 import random
+import struct
+import sys
+import threading
+import time
+import unicodedata
+import zlib
 import requests
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from difflib import SequenceMatcher
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 app = Flask(__name__)
 
-# NHL API Base URL
-NHL_API_BASE = "https://api-web.nhle.com/v1"
+# NHL API Base URL - point at nhl_stub_server.py to run without the network
+NHL_API_BASE = os.environ.get('NHL_API_BASE', "https://api-web.nhle.com/v1").rstrip('/')
 
 # Path to cached roster file
-import os
 ROSTER_FILE = os.path.join(os.path.dirname(__file__), 'nhl_rosters.json')
+ROSTER_SNAPSHOT_FILE = os.path.join(os.path.dirname(__file__), 'nhl_rosters.bin')
 EDGE_DATA_FILE = os.path.join(os.path.dirname(__file__), 'sharks_edge_data.json')
 
+# =============================================================================
+# METRICS - Per-route latency, upstream calls and cache hit ratios (/metrics)
+# =============================================================================
+
+# Histogram bucket upper bounds in seconds (Prometheus-style, +Inf is implicit)
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+METRICS_QUANTILES = [0.5, 0.95, 0.99]
+
+# Counters are per worker process - Prometheus sums them across workers
+METRICS = {
+    'started': time.time(),
+    'requests': {},   # route -> {'latency': histogram, 'status': {code: count}}
+    'upstream': {},   # endpoint template -> {'latency': histogram, 'status': {code or 'error': count}}
+    'cache': {}       # cache name -> {'hits': count, 'misses': count}
+}
+
+METRICS_LOCK = threading.Lock()
+
+def new_histogram():
+    """Empty latency histogram"""
+    return {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0, 'count': 0}
+
+def observe(histogram, seconds):
+    """Add one observation to a histogram"""
+    histogram['buckets'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+    histogram['sum'] += seconds
+    histogram['count'] += 1
+
+def histogram_quantile(histogram, q):
+    """Estimate a quantile by interpolating within the matching bucket"""
+    if not histogram['count']:
+        return 0.0
+    rank = q * histogram['count']
+    cumulative = 0
+    for index, count in enumerate(histogram['buckets']):
+        if cumulative + count >= rank and count:
+            if index == len(LATENCY_BUCKETS):
+                return LATENCY_BUCKETS[-1]
+            lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+            return lower + (LATENCY_BUCKETS[index] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return LATENCY_BUCKETS[-1]
+
+def record_timing(group, key, status, seconds):
+    """Record one timed event (a request or an upstream call)"""
+    with METRICS_LOCK:
+        entry = METRICS[group].get(key)
+        if entry is None:
+            entry = METRICS[group][key] = {'latency': new_histogram(), 'status': {}}
+        observe(entry['latency'], seconds)
+        entry['status'][status] = entry['status'].get(status, 0) + 1
+
+def record_cache(name, hit):
+    """Count a cache lookup"""
+    with METRICS_LOCK:
+        entry = METRICS['cache'].get(name)
+        if entry is None:
+            entry = METRICS['cache'][name] = {'hits': 0, 'misses': 0}
+        entry['hits' if hit else 'misses'] += 1
+
+def upstream_get(endpoint, url, **kwargs):
+    """requests.get that records latency and outcome under an endpoint template.
+
+    Raises UpstreamUnavailable without calling out while the endpoint's circuit breaker is open.
+    """
+    if 'timeout' in kwargs:
+        kwargs['timeout'] = budget_timeout(kwargs['timeout'])
+    if not breaker_allow(endpoint):
+        mark_partial()
+        raise UpstreamUnavailable(f"Circuit open for {endpoint}")
+    started = time.perf_counter()
+    try:
+        response = requests.get(url, **kwargs)
+    except Exception as e:
+        seconds = time.perf_counter() - started
+        record_timing('upstream', endpoint, 'error', seconds)
+        record_upstream_outcome(endpoint, url, 'error', seconds, error=e)
+        mark_partial()
+        raise
+    seconds = time.perf_counter() - started
+    record_timing('upstream', endpoint, response.status_code, seconds)
+    record_upstream_outcome(endpoint, url, response.status_code, seconds)
+    if response.status_code >= 500:
+        mark_partial()
+    return response
+
+def nhl_url(endpoint, **params):
+    """Full NHL API URL for an endpoint template"""
+    return NHL_API_BASE + endpoint.format(**params)
+
+def nhl_get(endpoint, timeout=10, **params):
+    """GET an NHL API endpoint, e.g. nhl_get('/player/{player_id}/landing', player_id=8484801)"""
+    return upstream_get(endpoint, nhl_url(endpoint, **params), timeout=timeout)
+
+# =============================================================================
+# UPSTREAM CIRCUIT BREAKERS - Stop waiting on an NHL endpoint that keeps failing
+# =============================================================================
+
+# Outcomes remembered per endpoint family (endpoint template, or 'headshot')
+BREAKER_WINDOW = int(os.environ.get('BREAKER_WINDOW', '20'))
+
+# Open once at least BREAKER_MIN_CALLS of the window are in and this share of them failed
+BREAKER_FAILURE_RATIO = float(os.environ.get('BREAKER_FAILURE_RATIO', '0.5'))
+BREAKER_MIN_CALLS = int(os.environ.get('BREAKER_MIN_CALLS', '5'))
+
+# A call slower than this counts as a failure even if it succeeded
+BREAKER_SLOW_SECONDS = float(os.environ.get('BREAKER_SLOW_SECONDS', '2.0'))
+
+# How long an open breaker rejects calls before letting one probe through
+BREAKER_COOLDOWN = float(os.environ.get('BREAKER_COOLDOWN', '30'))
+
+# Calls slower than this go to SLOW_CALL_LOG and stdout as one JSON line each
+SLOW_CALL_SECONDS = float(os.environ.get('SLOW_CALL_SECONDS', '1.0'))
+
+CIRCUIT_BREAKERS = {}
+BREAKER_LOCK = threading.Lock()
+SLOW_CALL_LOG = deque(maxlen=200)
+
+BREAKER_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+class UpstreamUnavailable(requests.RequestException):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+def breaker_entry(endpoint):
+    """Breaker state for an endpoint family (call with BREAKER_LOCK held)"""
+    entry = CIRCUIT_BREAKERS.get(endpoint)
+    if entry is None:
+        entry = CIRCUIT_BREAKERS[endpoint] = {
+            'state': 'closed',
+            'outcomes': deque(maxlen=BREAKER_WINDOW),
+            'opened_at': None,
+            'probing': False,
+            'trips': 0,
+            'rejected': 0
+        }
+    return entry
+
+def breaker_allow(endpoint):
+    """True if a call may go out; an open breaker lets a single probe through after the cooldown"""
+    with BREAKER_LOCK:
+        entry = breaker_entry(endpoint)
+        if entry['state'] == 'open' and time.time() - entry['opened_at'] >= BREAKER_COOLDOWN:
+            entry['state'] = 'half_open'
+            entry['probing'] = False
+        if entry['state'] == 'closed':
+            return True
+        if entry['state'] == 'half_open' and not entry['probing']:
+            entry['probing'] = True
+            return True
+        entry['rejected'] += 1
+        return False
+
+def open_breaker(endpoint, entry, reason):
+    entry['state'] = 'open'
+    entry['opened_at'] = time.time()
+    entry['probing'] = False
+    entry['outcomes'].clear()
+    entry['trips'] += 1
+    print(f"Circuit breaker for {endpoint} opened ({reason}), retrying in {BREAKER_COOLDOWN:.0f}s")
+
+def record_upstream_outcome(endpoint, url, status, seconds, error=None):
+    """Feed one call into the endpoint's breaker and the slow-call log"""
+    failed = status == 'error' or status == 429 or status >= 500 or seconds > BREAKER_SLOW_SECONDS
+    with BREAKER_LOCK:
+        entry = breaker_entry(endpoint)
+        if entry['state'] == 'half_open':
+            if failed:
+                open_breaker(endpoint, entry, f"probe failed with {status} in {seconds:.2f}s")
+            else:
+                entry['state'] = 'closed'
+                entry['probing'] = False
+                entry['outcomes'].clear()
+                print(f"Circuit breaker for {endpoint} closed")
+        else:
+            entry['outcomes'].append(failed)
+            failures = sum(entry['outcomes'])
+            if (entry['state'] == 'closed' and len(entry['outcomes']) >= BREAKER_MIN_CALLS
+                    and failures / len(entry['outcomes']) >= BREAKER_FAILURE_RATIO):
+                open_breaker(endpoint, entry, f"{failures}/{len(entry['outcomes'])} recent calls failed")
+        state = entry['state']
+
+    if seconds > SLOW_CALL_SECONDS:
+        import json
+        slow_call = {
+            'event': 'slow_upstream_call',
+            'time': round(time.time(), 3),
+            'endpoint': endpoint,
+            'url': url,
+            'status': status,
+            'seconds': round(seconds, 3),
+            'error': type(error).__name__ if error else None,
+            'breaker': state,
+            'route': request.url_rule.rule if has_request_context() and request.url_rule else None
+        }
+        SLOW_CALL_LOG.append(slow_call)
+        print(json.dumps(slow_call))
+
+def breaker_snapshot():
+    """Copy of every breaker's state for /metrics and the admin route"""
+    with BREAKER_LOCK:
+        return {
+            endpoint: {
+                'state': entry['state'],
+                'recent_calls': len(entry['outcomes']),
+                'recent_failures': sum(entry['outcomes']),
+                'opened_at': entry['opened_at'],
+                'trips': entry['trips'],
+                'rejected': entry['rejected']
+            }
+            for endpoint, entry in CIRCUIT_BREAKERS.items()
+        }
+
+# =============================================================================
+# REQUEST DEADLINES - Every upstream call shares one time budget per request
+# =============================================================================
+
+# Worst case a request may spend waiting on the NHL API, across all its calls
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', '4.0'))
+
+# Per-route overrides; None means no budget (admin jobs that walk every team)
+ROUTE_DEADLINES = {
+    '/api/admin/refresh-rosters': None
+}
+
+# Not worth starting an upstream call with less than this left
+UPSTREAM_MIN_TIMEOUT = 0.1
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """Raised instead of calling out once the request's budget is spent"""
+
+def remaining_budget():
+    """Seconds left in this request's budget, or None outside a request"""
+    if not has_request_context() or 'deadline' not in g:
+        return None
+    return g.deadline - time.perf_counter()
+
+def budget_timeout(timeout):
+    """Shrink an upstream timeout to what's left of the budget"""
+    remaining = remaining_budget()
+    if remaining is None:
+        return timeout
+    if remaining < UPSTREAM_MIN_TIMEOUT:
+        mark_partial()
+        raise DeadlineExceeded(f"Request budget of {REQUEST_DEADLINE_SECONDS}s spent")
+    return min(timeout, remaining) if timeout else remaining
+
+def mark_partial():
+    """Note that this response is built from fallback data because an upstream call didn't complete"""
+    if has_request_context():
+        g.partial = True
+
+def is_partial():
+    """True if an upstream call was skipped or failed while handling this request"""
+    return g.get('partial', False)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    budget = ROUTE_DEADLINES.get(request.url_rule.rule if request.url_rule else None, REQUEST_DEADLINE_SECONDS)
+    if budget:
+        g.deadline = g.request_started + budget
+
+@app.after_request
+def record_request_metrics(response):
+    """Time every request under its route template, not the raw path"""
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_timing('requests', route, response.status_code, time.perf_counter() - started)
+    return response
+
+def prometheus_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_histogram(lines, name, labels, histogram):
+    """Append one labelled histogram in Prometheus text format"""
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + ['+Inf'], histogram['buckets']):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{labels}}} {histogram["sum"]:.6f}')
+    lines.append(f'{name}_count{{{labels}}} {histogram["count"]}')
+
+def render_metrics():
+    """Render all metrics in the Prometheus text exposition format"""
+    with METRICS_LOCK:
+        snapshot = {
+            group: {key: {'latency': dict(entry['latency'], buckets=list(entry['latency']['buckets'])),
+                          'status': dict(entry['status'])}
+                    for key, entry in METRICS[group].items()}
+            for group in ('requests', 'upstream')
+        }
+        caches = {name: dict(entry) for name, entry in METRICS['cache'].items()}
+
+    lines = [
+        '# HELP hfd_uptime_seconds Seconds since this worker started.',
+        '# TYPE hfd_uptime_seconds gauge',
+        f'hfd_uptime_seconds {time.time() - METRICS["started"]:.3f}'
+    ]
+
+    families = (
+        ('requests', 'hfd_request', 'hfd_requests_total', 'route'),
+        ('upstream', 'hfd_upstream', 'hfd_upstream_calls_total', 'endpoint')
+    )
+    for group, metric, counter, label in families:
+        entries = sorted(snapshot[group].items())
+        lines.append(f'# HELP {metric}_duration_seconds Latency by {label}.')
+        lines.append(f'# TYPE {metric}_duration_seconds histogram')
+        for key, entry in entries:
+            render_histogram(lines, f'{metric}_duration_seconds', f'{label}="{prometheus_label(key)}"', entry['latency'])
+        lines.append(f'# HELP {metric}_latency_quantile_seconds p50/p95/p99 estimated from the histogram.')
+        lines.append(f'# TYPE {metric}_latency_quantile_seconds gauge')
+        for key, entry in entries:
+            for q in METRICS_QUANTILES:
+                lines.append(f'{metric}_latency_quantile_seconds{{{label}="{prometheus_label(key)}",quantile="{q}"}} '
+                             f'{histogram_quantile(entry["latency"], q):.6f}')
+        lines.append(f'# HELP {counter} Count by {label} and status.')
+        lines.append(f'# TYPE {counter} counter')
+        for key, entry in entries:
+            for status, count in sorted(entry['status'].items(), key=lambda item: str(item[0])):
+                lines.append(f'{counter}{{{label}="{prometheus_label(key)}",status="{status}"}} {count}')
+
+    breakers = breaker_snapshot()
+    lines.append('# HELP hfd_upstream_breaker_state Circuit breaker state (0 closed, 1 half-open, 2 open).')
+    lines.append('# TYPE hfd_upstream_breaker_state gauge')
+    for endpoint, entry in sorted(breakers.items()):
+        lines.append(f'hfd_upstream_breaker_state{{endpoint="{prometheus_label(endpoint)}"}} {BREAKER_STATE_VALUES[entry["state"]]}')
+    lines.append('# HELP hfd_upstream_breaker_rejected_total Calls short-circuited by an open breaker.')
+    lines.append('# TYPE hfd_upstream_breaker_rejected_total counter')
+    for endpoint, entry in sorted(breakers.items()):
+        lines.append(f'hfd_upstream_breaker_rejected_total{{endpoint="{prometheus_label(endpoint)}"}} {entry["rejected"]}')
+
+    telemetry = match_telemetry_snapshot()
+    for field, help_text in (('calls', 'Times a matching tier ran.'),
+                             ('seconds', 'Seconds spent in a matching tier.'),
+                             ('ratio_calls', 'SequenceMatcher ratios computed by a matching tier.'),
+                             ('resolved', 'Times a matching tier produced the answer.')):
+        lines.append(f'# HELP hfd_match_tier_{field}_total {help_text}')
+        lines.append(f'# TYPE hfd_match_tier_{field}_total counter')
+        for function, tiers in telemetry.items():
+            for tier, entry in tiers.items():
+                lines.append(f'hfd_match_tier_{field}_total{{function="{function}",tier="{tier}"}} {entry[field]}')
+
+    lines.append('# HELP hfd_cache_lookups_total Cache lookups by cache and result.')
+    lines.append('# TYPE hfd_cache_lookups_total counter')
+    for name, entry in sorted(caches.items()):
+        lines.append(f'hfd_cache_lookups_total{{cache="{name}",result="hit"}} {entry["hits"]}')
+        lines.append(f'hfd_cache_lookups_total{{cache="{name}",result="miss"}} {entry["misses"]}')
+    lines.append('# HELP hfd_cache_hit_ratio Hits / lookups since the worker started.')
+    lines.append('# TYPE hfd_cache_hit_ratio gauge')
+    for name, entry in sorted(caches.items()):
+        total = entry['hits'] + entry['misses']
+        lines.append(f'hfd_cache_hit_ratio{{cache="{name}"}} {entry["hits"] / total if total else 0:.4f}')
+
+    return '\n'.join(lines) + '\n'
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return app.response_class(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# =============================================================================
+# REQUEST PROFILING - Opt-in sampling profiler, folded stacks for flame graphs
+# =============================================================================
+
+# Unset disables per-request profiling (X-Profile: <token>) and the admin routes (X-Admin-Token: <token>).
+# Headers only - a token in the query string ends up in access logs, proxy logs and browser history.
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# Fraction of all requests profiled without being asked (0 = off)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', '5')) / 1000
+
+# On-disk ring - the oldest profile is deleted once there are more than this
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+PROFILE_RING_SIZE = int(os.environ.get('PROFILE_RING_SIZE', '50'))
+
+PROFILE_LOCK = threading.Lock()
+
+def admin_token_ok(token):
+    """True if ADMIN_TOKEN is configured and `token` matches it"""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or '', ADMIN_TOKEN)
+
+def admin_request_ok():
+    """True if the request carries the admin token in X-Admin-Token"""
+    return admin_token_ok(request.headers.get('X-Admin-Token'))
+
+def frame_label(frame):
+    """Flame graph frame name: function (file:first line)"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def sample_thread(thread_id, stop, stacks):
+    """Sample one thread's stack every PROFILE_INTERVAL until `stop` is set"""
+    while not stop.wait(PROFILE_INTERVAL):
+        frame = sys._current_frames().get(thread_id)
+        frames = []
+        while frame is not None:
+            frames.append(frame_label(frame))
+            frame = frame.f_back
+        # A sample taken while the handler was already waiting on us is profiler overhead
+        if frames and not stop.is_set():
+            key = ';'.join(reversed(frames))
+            stacks[key] = stacks.get(key, 0) + 1
+
+def profiled_path():
+    """Request path and query string with the admin token params stripped"""
+    from urllib.parse import urlencode
+    args = [(key, value) for key, value in request.args.items(multi=True) if key not in ('profile', 'token')]
+    return f"{request.path}?{urlencode(args)}" if args else request.path
+
+def save_profile(profile_id, route, seconds, status, stacks):
+    """Write folded stacks plus metadata into the ring (metadata only if no samples landed)"""
+    import json
+    with PROFILE_LOCK:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if stacks:
+            with open(os.path.join(PROFILE_DIR, f"{profile_id}.folded"), 'w') as f:
+                for stack, count in sorted(stacks.items()):
+                    f.write(f"{stack} {count}\n")
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), 'w') as f:
+            json.dump({
+                'id': profile_id,
+                'route': route,
+                'path': profiled_path(),
+                'status': status,
+                'duration_ms': round(seconds * 1000, 2),
+                'samples': sum(stacks.values()),
+                'interval_ms': PROFILE_INTERVAL * 1000,
+                'created': time.time()
+            }, f)
+        profile_ids = sorted(name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith('.json'))
+        for old_id in profile_ids[:-PROFILE_RING_SIZE]:
+            for ext in ('.json', '.folded'):
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, old_id + ext))
+                except OSError:
+                    pass
+
+def profile_requested():
+    """Profile this request if asked with the admin token, or if it falls in the sampled fraction"""
+    token = request.headers.get('X-Profile')
+    if token:
+        return admin_token_ok(token)
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+@app.before_request
+def start_profiler():
+    if request.path.startswith('/api/admin/profiles') or not profile_requested():
+        return
+    stop = threading.Event()
+    stacks = {}
+    sampler = threading.Thread(target=sample_thread, args=(threading.get_ident(), stop, stacks), daemon=True)
+    sampler.start()
+    # Millisecond timestamp first so ids sort oldest-first for the ring
+    g.profile_id = f"{int(time.time() * 1000)}-{os.getpid()}-{threading.get_ident() % 100000}"
+    g.profiler = (sampler, stop, stacks, time.perf_counter())
+
+@app.after_request
+def add_profile_header(response):
+    """Profiles are saved at teardown; tell the caller which id to fetch"""
+    if getattr(g, 'profiler', None):
+        g.profile_status = response.status_code
+        response.headers['X-Profile-Id'] = g.profile_id
+    return response
+
+@app.teardown_request
+def stop_profiler(exc):
+    """Runs after every after_request hook, so compression shows up in the profile too"""
+    profiler = g.pop('profiler', None)
+    if not profiler:
+        return
+    sampler, stop, stacks, started = profiler
+    stop.set()
+    sampler.join()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    try:
+        save_profile(g.profile_id, route, time.perf_counter() - started, g.get('profile_status', 500), stacks)
+    except OSError as e:
+        print(f"Could not save profile: {e}")
+
+@app.route('/api/admin/profiles')
+def admin_profiles():
+    """List saved profiles, newest first"""
+    if not admin_request_ok():
+        return jsonify({'error': 'Admin token required'}), 403
+    import json
+    profiles = []
+    if os.path.isdir(PROFILE_DIR):
+        for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(PROFILE_DIR, name), 'r') as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+    return jsonify({'ring_size': PROFILE_RING_SIZE, 'profiles': profiles})
+
+@app.route('/api/admin/profiles/<profile_id>')
+def admin_profile(profile_id):
+    """One profile as folded stacks - pipe into flamegraph.pl or load in speedscope"""
+    if not admin_request_ok():
+        return jsonify({'error': 'Admin token required'}), 403
+    path = os.path.join(PROFILE_DIR, os.path.basename(profile_id) + '.folded')
+    if not os.path.exists(path):
+        # Requests shorter than one sample interval only get metadata
+        if os.path.exists(os.path.join(PROFILE_DIR, os.path.basename(profile_id) + '.json')):
+            return jsonify({'error': 'Profile has no samples'}), 404
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='text/plain')
+
+# =============================================================================
+# MEMORY REPORT - Deep sizes of module-level caches, tables and indexes
+# =============================================================================
+
+# Recent reports, so growth between them shows up without an external tool
+MEMORY_SNAPSHOTS = deque(maxlen=20)
+
+MEMORY_LOCK = threading.Lock()
+
+# Not data - skipped when walking an object graph
+MEMORY_SKIP_TYPES = (type, type(sys), type(len), type(lambda: None), type(threading.Lock()))
+
+def deep_sizeof(obj, seen=None):
+    """Bytes reachable from obj, counting each object once (shared strings included once).
+
+    `seen` maps id -> size for every object walked, so callers can merge walks without repeating them.
+    """
+    seen = {} if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, MEMORY_SKIP_TYPES):
+            continue
+        size = seen[id(item)] = sys.getsizeof(item)
+        total += size
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        elif not isinstance(item, (str, bytes, int, float, bool)):
+            if hasattr(item, '__dict__'):
+                stack.append(item.__dict__)
+            for slot in getattr(type(item), '__slots__', ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+def tracked_structures():
+    """Every module-level UPPER_CASE container - new caches and indexes are picked up automatically"""
+    return {
+        name: value for name, value in globals().items()
+        if name.isupper() and name not in ('MEMORY_SNAPSHOTS', 'MEMORY_SKIP_TYPES')
+        and not isinstance(value, (str, bytes, int, float, bool, type(None)) + MEMORY_SKIP_TYPES)
+    }
+
+def process_rss():
+    """Resident set size of this worker in bytes (VmRSS, or peak RSS where /proc is missing)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def memory_snapshot():
+    """Deep size and item count of every tracked structure, plus RSS"""
+    structures = {}
+    shared = {}
+    for name, value in sorted(tracked_structures().items()):
+        # One walk per structure: its own size, then its objects merged into the deduplicated total
+        seen = {}
+        structures[name] = {
+            'bytes': deep_sizeof(value, seen),
+            'items': len(value) if hasattr(value, '__len__') else None
+        }
+        shared.update(seen)
+    return {
+        'time': time.time(),
+        'rss_bytes': process_rss(),
+        # Structures share strings, so the per-structure sizes add up to more than this
+        'tracked_bytes': sum(shared.values()),
+        'structures': structures
+    }
+
+def memory_growth(old, new):
+    """Byte and item deltas between two snapshots, biggest growth first"""
+    deltas = {}
+    for name, entry in new['structures'].items():
+        before = old['structures'].get(name, {'bytes': 0, 'items': 0})
+        delta = entry['bytes'] - before['bytes']
+        if delta:
+            deltas[name] = {
+                'bytes': delta,
+                'items': (entry['items'] or 0) - (before['items'] or 0)
+            }
+    return {
+        'seconds': round(new['time'] - old['time'], 1),
+        'rss_bytes': new['rss_bytes'] - old['rss_bytes'],
+        'tracked_bytes': new['tracked_bytes'] - old['tracked_bytes'],
+        'structures': dict(sorted(deltas.items(), key=lambda item: -abs(item[1]['bytes'])))
+    }
+
+@app.route('/api/admin/memory')
+def admin_memory():
+    """Memory report for this worker; each call is a snapshot compared with the previous and first"""
+    if not admin_request_ok():
+        return jsonify({'error': 'Admin token required'}), 403
+    snapshot = memory_snapshot()
+    with MEMORY_LOCK:
+        previous = MEMORY_SNAPSHOTS[-1] if MEMORY_SNAPSHOTS else None
+        first = MEMORY_SNAPSHOTS[0] if MEMORY_SNAPSHOTS else None
+        MEMORY_SNAPSHOTS.append(snapshot)
+    return jsonify({
+        'pid': os.getpid(),
+        'rss_bytes': snapshot['rss_bytes'],
+        'tracked_bytes': snapshot['tracked_bytes'],
+        'structures': dict(sorted(snapshot['structures'].items(), key=lambda item: -item[1]['bytes'])),
+        'growth_since_previous': memory_growth(previous, snapshot) if previous else None,
+        'growth_since_first': memory_growth(first, snapshot) if first and first is not previous else None,
+        'snapshots': len(MEMORY_SNAPSHOTS)
+    })
+
 # =============================================================================
 # NHL EDGE DATA - Load from JSON file for instant stats
 # =============================================================================
@@ -45,31 +702,393 @@ load_edge_data()
 # NHL ROSTER CACHE - Load from JSON file for instant startup
 # =============================================================================
 
+# Keys of each player in nhl_rosters.json
+ROSTER_FIELDS = ('id', 'name', 'first_name', 'last_name', 'position', 'number', 'team')
+
+# Letters NFKD leaves alone, plus punctuation that names are written with or without
+NAME_FOLD_TABLE = str.maketrans({
+    'ø': 'o', 'Ø': 'o', 'æ': 'ae', 'Æ': 'ae', 'ß': 'ss', 'ł': 'l', 'Ł': 'l', 'đ': 'd', 'Đ': 'd',
+    '-': ' ', '.': '', "'": '', '\u2019': '', '`': ''
+})
+
+def fold_name(text):
+    """Lowercase, accents and punctuation stripped, for matching - "J.T. O'Määttä-Bäck" -> 'jt omaatta back'"""
+    decomposed = unicodedata.normalize('NFKD', text.translate(NAME_FOLD_TABLE))
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
+# Canonical first name -> the other ways it's written, so 'Alex Ovechkin' and 'Alexander Ovechkin' share a key
+FIRST_NAME_ALIASES = {
+    'alex': ('alexander', 'aleksander', 'alexandre', 'alexey', 'aliaksei'),
+    'ben': ('benjamin',),
+    'bob': ('bobby', 'rob', 'robby', 'robert'),
+    'cam': ('cameron',),
+    'charlie': ('charles',),
+    'chris': ('christopher',),
+    'dan': ('danny', 'daniel'),
+    'dmitri': ('dmitry', 'dmitrii'),
+    'doug': ('dougie', 'douglas'),
+    'egor': ('yegor',),
+    'evgeni': ('evgenii', 'evgeny'),
+    'fred': ('freddie', 'frederik', 'frederick'),
+    'gabe': ('gabriel',),
+    'jake': ('jacob', 'jakob', 'jaccob'),
+    'jeff': ('jeffrey',),
+    'jim': ('jimmy', 'james', 'jamie'),
+    'joe': ('joey', 'joseph'),
+    'jon': ('jonny', 'jonathan', 'johnathan', 'jonatan'),
+    'josh': ('joshua',),
+    'matt': ('matty', 'matthew', 'mathew'),
+    'mike': ('mikey', 'michael'),
+    'mitch': ('mitchell',),
+    'nate': ('nathan',),
+    'nick': ('nic', 'nicholas', 'nicolas', 'nikolas'),
+    'pat': ('patrick', 'patrik'),
+    'phil': ('philip', 'phillip', 'philipp'),
+    'sam': ('sammy', 'samuel'),
+    'sid': ('sidney',),
+    'steve': ('steven', 'stephen'),
+    'ted': ('teddy', 'theodore'),
+    'tim': ('timothy',),
+    'tom': ('tommy', 'thomas', 'tomas'),
+    'tony': ('anthony',),
+    'vince': ('vincent', 'vinnie'),
+    'will': ('william',),
+    'zach': ('zac', 'zack', 'zachary')
+}
+FIRST_NAME_CANONICAL = {alias: name for name, aliases in FIRST_NAME_ALIASES.items() for alias in aliases}
+
+def name_alias_key(folded_name):
+    """A folded full name with its first name replaced by the canonical nickname"""
+    first, _, rest = folded_name.partition(' ')
+    return f"{FIRST_NAME_CANONICAL.get(first, first)} {rest}" if rest else folded_name
+
+class RosterPlayer:
+    """One rostered NHL player - slots rather than a dict, with the match keys folded once at load"""
+    __slots__ = ROSTER_FIELDS + ('name_key', 'first_key', 'last_key')
+
+    def __init__(self, id, name, first_name, last_name, position, number, team):
+        self.id = id
+        self.name = name
+        self.first_name = sys.intern(first_name)
+        self.last_name = last_name
+        # ~30 team and 5 position codes shared by 800 players
+        self.position = sys.intern(position)
+        self.number = number
+        self.team = sys.intern(team)
+        self.name_key = fold_name(name)
+        self.first_key = sys.intern(fold_name(first_name))
+        self.last_key = fold_name(last_name)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in ROSTER_FIELDS}
+
+# RosterPlayer per rostered player, in team order, plus the same players by id
 NHL_ROSTER_CACHE = []
+NHL_ROSTER_BY_ID = {}
 NHL_ROSTER_LOADED = False
 
+# {'names': alias key -> players, 'last_names': last name key -> players}; built on first search after each set_roster()
+NHL_ROSTER_NAME_INDEX = None
+
+def roster_player_from_api(player, team):
+    """RosterPlayer from one entry of a /roster/{team}/current response"""
+    first_name = player.get('firstName', {}).get('default', '')
+    last_name = player.get('lastName', {}).get('default', '')
+    return RosterPlayer(
+        id=player.get('id'),
+        name=f"{first_name} {last_name}",
+        first_name=first_name,
+        last_name=last_name,
+        position=player.get('positionCode', ''),
+        number=player.get('sweaterNumber', ''),
+        team=team
+    )
+
+def set_roster(players):
+    """Swap in a new roster and its id index"""
+    global NHL_ROSTER_CACHE, NHL_ROSTER_BY_ID, NHL_ROSTER_NAME_INDEX
+    NHL_ROSTER_BY_ID = players.by_id if isinstance(players, RosterSnapshot) else {p.id: p for p in players}
+    NHL_ROSTER_CACHE = players
+    NHL_ROSTER_NAME_INDEX = None
+
+def roster_name_index():
+    """Exact and phonetic lookups over the folded names, built lazily so a mapped snapshot isn't decoded at startup"""
+    global NHL_ROSTER_NAME_INDEX
+    index = NHL_ROSTER_NAME_INDEX
+    if index is None:
+        index = {'names': {}, 'last_names': {}, 'phonetic_names': {}, 'phonetic_last_names': {}}
+        for p in NHL_ROSTER_CACHE:
+            alias_key = name_alias_key(p.name_key)
+            index['names'].setdefault(alias_key, []).append(p)
+            index['last_names'].setdefault(p.last_key, []).append(p)
+            index['phonetic_names'].setdefault(phonetic_name_key(alias_key), []).append(p)
+            index['phonetic_last_names'].setdefault(phonetic_key(p.last_key), []).append(p)
+        NHL_ROSTER_NAME_INDEX = index
+    return index
+
+# =============================================================================
+# PHONETIC KEYS - Sound-alike surnames ('Celebreeni' -> Celebrini, 'Hurtle' -> Hertl)
+# =============================================================================
+
+# Shortlisted players must still be this close to the query as text
+PHONETIC_MIN_SIMILARITY = 0.6
+
+# Shorter words have too many sound-alikes ('Ben' -> Benn, Bean)
+PHONETIC_MIN_LENGTH = 4
+
+PHONETIC_VOWELS = set('aeiouy')
+
+def phonetic_key(word):
+    """Simplified Metaphone code of a folded name - the consonant sounds, with the spellings of each merged"""
+    # Doubled letters sound single ('Matthews' = 'Mathews'), except 'cc' as in 'Acciari'
+    letters = [c for c in word if c.isalpha()]
+    word = ''.join(c for i, c in enumerate(letters) if i == 0 or c != letters[i - 1] or c == 'c')
+    if word[:2] in ('kn', 'gn', 'pn', 'wr', 'ps'):
+        word = word[1:]
+    codes = []
+    for i, c in enumerate(word):
+        prev = word[i - 1] if i else ''
+        nxt = word[i + 1] if i + 1 < len(word) else ''
+        if c in PHONETIC_VOWELS:
+            code = 'A' if i == 0 else ''
+        elif c == 'c':
+            if nxt == 'h':
+                code = 'X'
+            elif nxt in ('e', 'i', 'y'):
+                code = 'S'
+            else:
+                code = 'K'
+        elif c == 'd':
+            code = 'J' if nxt == 'g' else 'T'
+        elif c == 'g':
+            if nxt == 'h' or (nxt == 'n' and i + 2 == len(word)):
+                code = ''
+            else:
+                code = 'J' if nxt in ('e', 'i', 'y') and prev != 'g' else 'K'
+        elif c == 'h':
+            code = 'H' if nxt in PHONETIC_VOWELS and prev not in ('c', 's', 'p', 't', 'g') else ''
+        elif c == 'p':
+            code = 'F' if nxt == 'h' else 'P'
+        elif c == 's':
+            code = 'X' if nxt == 'h' or word[i + 1:i + 3] in ('ch', 'io', 'ia') else 'S'
+        elif c == 't':
+            if nxt == 'h':
+                code = '0'
+            elif word[i + 1:i + 3] in ('io', 'ia'):
+                code = 'X'
+            else:
+                code = '' if word[i + 1:i + 3] == 'ch' else 'T'
+        elif c == 'w':
+            code = 'W' if nxt in PHONETIC_VOWELS else ''
+        else:
+            code = {'b': 'P', 'f': 'F', 'v': 'F', 'j': 'J', 'k': 'K', 'q': 'K', 'x': 'KS', 'z': 'S'}.get(c, c.upper())
+        # 'ck'-style pairs make one sound
+        if code and not (codes and codes[-1] == code):
+            codes.append(code)
+    return ''.join(codes)
+
+def phonetic_name_key(folded_name):
+    """Phonetic codes of the first name and the rest of a folded full name"""
+    first, _, rest = folded_name.partition(' ')
+    return f"{phonetic_key(first)} {phonetic_key(rest)}"
+
+def phonetic_candidates(query):
+    """Players who sound like the query, closest spelling first - a dict lookup plus a few ratio calls"""
+    if len(query.replace(' ', '')) < PHONETIC_MIN_LENGTH:
+        return []
+    index = roster_name_index()
+    if ' ' in query:
+        key = name_alias_key(query)
+        shortlist = [(p, name_alias_key(p.name_key)) for p in index['phonetic_names'].get(phonetic_name_key(key), [])]
+    else:
+        key = query
+        shortlist = [(p, p.last_key) for p in index['phonetic_last_names'].get(phonetic_key(query), [])]
+    scored = [(similarity_score(key, text), p) for p, text in shortlist]
+    scored = [(score, p) for score, p in scored if score >= PHONETIC_MIN_SIMILARITY]
+    scored.sort(key=lambda item: (-item[0], item[1].name))
+    return scored
+
+# =============================================================================
+# BINARY ROSTER SNAPSHOT - nhl_rosters.bin, memory-mapped instead of parsed
+# =============================================================================
+#
+# Written next to nhl_rosters.json whenever that's saved (or found newer than the snapshot):
+#   header    magic, version, record size, player count, id index offset, string pool offset
+#   records   one fixed-width RosterPlayer per player, in roster order; strings are (offset, length) into the pool
+#   id index  (id, record number) pairs sorted by id
+#   pool      UTF-8 strings, each distinct one stored once
+# Workers map it read-only, so they share the page cache, and decode a record only when it's first used.
+
+ROSTER_SNAPSHOT_MAGIC = b'HFDR'
+# Bump when fold_name() changes - the folded keys are stored in the snapshot
+ROSTER_SNAPSHOT_VERSION = 2
+ROSTER_SNAPSHOT_HEADER = struct.Struct('<4sHHIII')
+# Folded keys are stored too, so a decoded record needs no Unicode work
+ROSTER_SNAPSHOT_STRINGS = ('name', 'first_name', 'last_name', 'position', 'team', 'name_key', 'first_key', 'last_key')
+ROSTER_SNAPSHOT_RECORD = struct.Struct('<qh' + 'IH' * len(ROSTER_SNAPSHOT_STRINGS))
+ROSTER_SNAPSHOT_INDEX = struct.Struct('<qI')
+
+def write_roster_snapshot(players, path=ROSTER_SNAPSHOT_FILE):
+    """Write RosterPlayers as a binary snapshot (via a temp file, so readers never see half of one)"""
+    pool = bytearray()
+    offsets = {}
+    records = []
+    for p in players:
+        refs = []
+        for field in ROSTER_SNAPSHOT_STRINGS:
+            text = getattr(p, field)
+            if text not in offsets:
+                encoded = text.encode('utf-8')
+                offsets[text] = (len(pool), len(encoded))
+                pool += encoded
+            refs.extend(offsets[text])
+        # Sweater numbers are ints, or '' for players without one
+        number = p.number if isinstance(p.number, int) else -1
+        records.append(ROSTER_SNAPSHOT_RECORD.pack(p.id or 0, number, *refs))
+
+    index = b''.join(ROSTER_SNAPSHOT_INDEX.pack(player_id, row)
+                     for player_id, row in sorted((p.id or 0, row) for row, p in enumerate(players)))
+    index_offset = ROSTER_SNAPSHOT_HEADER.size + ROSTER_SNAPSHOT_RECORD.size * len(records)
+    header = ROSTER_SNAPSHOT_HEADER.pack(ROSTER_SNAPSHOT_MAGIC, ROSTER_SNAPSHOT_VERSION, ROSTER_SNAPSHOT_RECORD.size,
+                                         len(records), index_offset, index_offset + len(index))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.writelines(records)
+        f.write(index)
+        f.write(pool)
+    os.replace(tmp_path, path)
+
+class RosterSnapshot:
+    """Read-only sequence of RosterPlayers over a mapped snapshot, decoding each record on first access"""
+    __slots__ = ('data', 'count', 'index_offset', 'pool_offset', 'players', 'by_id')
+
+    def __init__(self, data):
+        magic, version, record_size, count, index_offset, pool_offset = ROSTER_SNAPSHOT_HEADER.unpack_from(data)
+        if magic != ROSTER_SNAPSHOT_MAGIC or version != ROSTER_SNAPSHOT_VERSION or record_size != ROSTER_SNAPSHOT_RECORD.size:
+            raise ValueError("Roster snapshot is from a different format version")
+        self.data = data
+        self.count = count
+        self.index_offset = index_offset
+        self.pool_offset = pool_offset
+        self.players = [None] * count
+        self.by_id = RosterSnapshotIndex(self)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self.count))]
+        if row < 0:
+            row += self.count
+        player = self.players[row]
+        if player is None:
+            player = self.players[row] = self.decode(row)
+        return player
+
+    def __iter__(self):
+        for row in range(self.count):
+            yield self[row]
+
+    def decode(self, row):
+        fields = ROSTER_SNAPSHOT_RECORD.unpack_from(self.data, ROSTER_SNAPSHOT_HEADER.size + row * ROSTER_SNAPSHOT_RECORD.size)
+        player = RosterPlayer.__new__(RosterPlayer)
+        player.id = fields[0]
+        player.number = fields[1] if fields[1] >= 0 else ''
+        for i, field in enumerate(ROSTER_SNAPSHOT_STRINGS):
+            start = self.pool_offset + fields[2 + 2 * i]
+            text = self.data[start:start + fields[3 + 2 * i]].decode('utf-8')
+            setattr(player, field, sys.intern(text) if field in ('first_name', 'position', 'team', 'first_key') else text)
+        return player
+
+    def row_for_id(self, player_id):
+        """Binary search of the id index; None if the id isn't in the snapshot"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_id, row = ROSTER_SNAPSHOT_INDEX.unpack_from(self.data, self.index_offset + middle * ROSTER_SNAPSHOT_INDEX.size)
+            if middle_id == player_id:
+                return row
+            if middle_id < player_id:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+class RosterSnapshotIndex:
+    """NHL_ROSTER_BY_ID for a RosterSnapshot - looks ids up in the mapped index rather than building a dict"""
+    __slots__ = ('snapshot',)
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __contains__(self, player_id):
+        return isinstance(player_id, int) and self.snapshot.row_for_id(player_id) is not None
+
+    def get(self, player_id, default=None):
+        row = self.snapshot.row_for_id(player_id) if isinstance(player_id, int) else None
+        return default if row is None else self.snapshot[row]
+
+    def __getitem__(self, player_id):
+        player = self.get(player_id)
+        if player is None:
+            raise KeyError(player_id)
+        return player
+
+def open_roster_snapshot(path=ROSTER_SNAPSHOT_FILE):
+    """Map the snapshot if it's at least as new as nhl_rosters.json, else None"""
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(ROSTER_FILE):
+            return None
+        with open(path, 'rb') as f:
+            return RosterSnapshot(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Roster snapshot unusable, reading JSON instead: {e}")
+        return None
+
+def save_roster_snapshot(players):
+    try:
+        write_roster_snapshot(players)
+    except OSError as e:
+        print(f"Could not write roster snapshot: {e}")
+
 def load_rosters_from_file():
-    """Load rosters from JSON file (instant)"""
-    global NHL_ROSTER_CACHE, NHL_ROSTER_LOADED
+    """Load rosters from the binary snapshot (mapped, no parse) or the JSON file"""
+    global NHL_ROSTER_LOADED
+
+    snapshot = open_roster_snapshot() if os.path.exists(ROSTER_SNAPSHOT_FILE) else None
+    if snapshot is not None:
+        set_roster(snapshot)
+        NHL_ROSTER_LOADED = True
+        print(f"Mapped {len(NHL_ROSTER_CACHE)} players from roster snapshot")
+        return True
 
     try:
         import json
         with open(ROSTER_FILE, 'r') as f:
-            NHL_ROSTER_CACHE = json.load(f)
+            set_roster([RosterPlayer(**{field: p.get(field, '') for field in ROSTER_FIELDS}) for p in json.load(f)])
         NHL_ROSTER_LOADED = True
         print(f"Loaded {len(NHL_ROSTER_CACHE)} players from cache file")
+        # Missing or older than the JSON - write it so the next worker can map it
+        save_roster_snapshot(NHL_ROSTER_CACHE)
         return True
     except Exception as e:
         print(f"Could not load from file: {e}")
         return False
 
 def save_rosters_to_file():
-    """Save current roster cache to JSON file"""
+    """Save current roster cache to JSON file, plus the binary snapshot"""
     try:
         import json
         with open(ROSTER_FILE, 'w') as f:
-            json.dump(NHL_ROSTER_CACHE, f)
+            json.dump([p.to_dict() for p in NHL_ROSTER_CACHE], f)
         print(f"Saved {len(NHL_ROSTER_CACHE)} players to cache file")
+        save_roster_snapshot(NHL_ROSTER_CACHE)
         return True
     except Exception as e:
         print(f"Could not save to file: {e}")
@@ -77,7 +1096,7 @@ def save_rosters_to_file():
 
 def load_all_nhl_rosters():
     """Load all NHL rosters - from file first, then API as fallback"""
-    global NHL_ROSTER_CACHE, NHL_ROSTER_LOADED
+    global NHL_ROSTER_LOADED
 
     if NHL_ROSTER_LOADED:
         return
@@ -101,24 +1120,16 @@ def load_all_nhl_rosters():
 
     for team in teams:
         try:
-            response = requests.get(f"{NHL_API_BASE}/roster/{team}/current", timeout=10)
+            response = nhl_get('/roster/{team}/current', team=team, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 for pos in ['forwards', 'defensemen', 'goalies']:
                     for player in data.get(pos, []):
-                        all_players.append({
-                            'id': player.get('id'),
-                            'name': f"{player.get('firstName', {}).get('default', '')} {player.get('lastName', {}).get('default', '')}",
-                            'first_name': player.get('firstName', {}).get('default', ''),
-                            'last_name': player.get('lastName', {}).get('default', ''),
-                            'position': player.get('positionCode', ''),
-                            'number': player.get('sweaterNumber', ''),
-                            'team': team
-                        })
+                        all_players.append(roster_player_from_api(player, team))
         except Exception as e:
             print(f"Error loading {team}: {e}")
 
-    NHL_ROSTER_CACHE = all_players
+    set_roster(all_players)
     NHL_ROSTER_LOADED = True
     print(f"Loaded {len(all_players)} NHL players from API")
 
@@ -127,11 +1138,12 @@ def load_all_nhl_rosters():
 
 def refresh_rosters_from_api():
     """Force refresh rosters from NHL API and update cache file"""
-    global NHL_ROSTER_CACHE, NHL_ROSTER_LOADED
+    global NHL_ROSTER_LOADED
 
     print("Refreshing NHL rosters from API...")
+    previous_players = NHL_ROSTER_CACHE
     NHL_ROSTER_LOADED = False
-    NHL_ROSTER_CACHE = []
+    set_roster([])
 
     teams = [
         'ANA', 'BOS', 'BUF', 'CGY', 'CAR', 'CHI', 'COL', 'CBJ',
@@ -144,26 +1156,24 @@ def refresh_rosters_from_api():
 
     for team in teams:
         try:
-            response = requests.get(f"{NHL_API_BASE}/roster/{team}/current", timeout=10)
+            response = nhl_get('/roster/{team}/current', team=team, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 for pos in ['forwards', 'defensemen', 'goalies']:
                     for player in data.get(pos, []):
-                        all_players.append({
-                            'id': player.get('id'),
-                            'name': f"{player.get('firstName', {}).get('default', '')} {player.get('lastName', {}).get('default', '')}",
-                            'first_name': player.get('firstName', {}).get('default', ''),
-                            'last_name': player.get('lastName', {}).get('default', ''),
-                            'position': player.get('positionCode', ''),
-                            'number': player.get('sweaterNumber', ''),
-                            'team': team
-                        })
+                        all_players.append(roster_player_from_api(player, team))
+            else:
+                print(f"Error loading {team}: HTTP {response.status_code}")
+                all_players.extend(p for p in previous_players if p.team == team)
         except Exception as e:
+            # Keep the team's previous players rather than dropping them from the file
             print(f"Error loading {team}: {e}")
+            all_players.extend(p for p in previous_players if p.team == team)
 
-    NHL_ROSTER_CACHE = all_players
+    set_roster(all_players)
     NHL_ROSTER_LOADED = True
     save_rosters_to_file()
+    clear_compare_cache()
     return len(all_players)
 
 # =============================================================================
@@ -3813,6 +4823,73 @@ PLAYER_ARCHETYPES = {
     }
 }
 
+# =============================================================================
+# MATCH TELEMETRY - Which tier resolved a query, how long it took, how much fuzzing
+# =============================================================================
+
+# (function, tier) -> {'calls', 'seconds', 'ratio_calls', 'resolved'}
+MATCH_TELEMETRY = {}
+
+# Fraction of fuzzy-tier queries kept in FUZZY_QUERY_LOG
+FUZZY_QUERY_SAMPLE_RATE = float(os.environ.get('FUZZY_QUERY_SAMPLE_RATE', '0.1'))
+
+FUZZY_QUERY_LOG = deque(maxlen=500)
+
+# Per-thread count of SequenceMatcher ratios, so a tier can see how many it ran
+_match_local = threading.local()
+
+def match_telemetry_entry(function, tier):
+    """Counter dict for a (function, tier) pair - caller holds METRICS_LOCK"""
+    entry = MATCH_TELEMETRY.get((function, tier))
+    if entry is None:
+        entry = MATCH_TELEMETRY[(function, tier)] = {'calls': 0, 'seconds': 0.0, 'ratio_calls': 0, 'resolved': 0}
+    return entry
+
+@contextmanager
+def match_tier(function, tier):
+    """Time one matching tier; set state['resolved'] = True if it produced the answer"""
+    state = {'resolved': False}
+    ratio_calls = getattr(_match_local, 'ratio_calls', 0)
+    started = time.perf_counter()
+    try:
+        yield state
+    finally:
+        seconds = time.perf_counter() - started
+        with METRICS_LOCK:
+            entry = match_telemetry_entry(function, tier)
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['ratio_calls'] += getattr(_match_local, 'ratio_calls', 0) - ratio_calls
+            if state['resolved']:
+                entry['resolved'] += 1
+
+def record_match_resolution(function, tier):
+    """Credit the fuzzy tier whose candidate won (None = no match at all)"""
+    with METRICS_LOCK:
+        match_telemetry_entry(function, tier or 'unresolved')['resolved'] += 1
+
+def sample_fuzzy_query(function, query, result, tier, score, ratio_calls):
+    """Keep a sample of queries that fell through to fuzzy matching - they're synonym candidates"""
+    if random.random() >= FUZZY_QUERY_SAMPLE_RATE:
+        return
+    FUZZY_QUERY_LOG.append({
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'function': function,
+        'query': query,
+        'result': result,
+        'tier': tier,
+        'score': round(score, 3),
+        'ratio_calls': ratio_calls
+    })
+
+def match_telemetry_snapshot():
+    """Copy of the tier counters, grouped by function"""
+    with METRICS_LOCK:
+        snapshot = {}
+        for (function, tier), entry in sorted(MATCH_TELEMETRY.items()):
+            snapshot.setdefault(function, {})[tier] = dict(entry, seconds=round(entry['seconds'], 6))
+    return snapshot
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
@@ -3833,8 +4910,107 @@ def get_all_players():
 
 def similarity_score(a, b):
     """Calculate string similarity using SequenceMatcher"""
+    _match_local.ratio_calls = getattr(_match_local, 'ratio_calls', 0) + 1
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
+# =============================================================================
+# FUZZY KEY INDEXES - BK-trees over the keys of the lookup tables
+# =============================================================================
+
+# Tables whose routes fall back to the closest key on a miss
+FUZZY_KEY_TABLES = {
+    'stats': STATS_GLOSSARY,
+    'dictionary': HOCKEY_DICTIONARY,
+    'rink': RINK_ZONES,
+    'sharks': SHARKS_ROSTER
+}
+
+# Table name -> BK-tree root, built by build_fuzzy_key_indexes() at startup
+FUZZY_KEY_INDEXES = {}
+
+def char_masks(text):
+    """Bit j of masks[c] is set where text[j] == c"""
+    masks = {}
+    for j, char in enumerate(text):
+        masks[char] = masks.get(char, 0) | (1 << j)
+    return masks
+
+def indel_distance(text, other, other_masks):
+    """Insertions plus deletions turning text into other - len(text) + len(other) - 2 * LCS.
+
+    The LCS uses the bit-parallel algorithm (Allison-Dix), so it costs one pass over text
+    rather than a len(text) x len(other) table.
+    """
+    full = (1 << len(other)) - 1
+    v = full
+    for char in text:
+        u = v & other_masks.get(char, 0)
+        v = ((v + u) | (v - u)) & full
+    lcs = len(other) - v.bit_count()
+    return len(text) + len(other) - 2 * lcs
+
+def build_bk_tree(keys):
+    """BK-tree over keys; each node is [key, char masks, position in keys, longest key in its subtree, {distance: child}]"""
+    root = None
+    for order, key in enumerate(keys):
+        node = [key, char_masks(key), order, len(key), {}]
+        if root is None:
+            root = node
+            continue
+        parent = root
+        while True:
+            parent[3] = max(parent[3], len(key))
+            distance = indel_distance(key, parent[0], parent[1])
+            if distance not in parent[4]:
+                parent[4][distance] = node
+                break
+            parent = parent[4][distance]
+    return root
+
+def build_fuzzy_key_indexes():
+    for name, table in FUZZY_KEY_TABLES.items():
+        FUZZY_KEY_INDEXES[name] = build_bk_tree(list(table.keys()))
+    print(f"Built fuzzy key indexes for {', '.join(FUZZY_KEY_INDEXES)}")
+
+def fuzzy_key_candidates(root, query, threshold):
+    """(position, key) for every key whose SequenceMatcher ratio with query could be above threshold.
+
+    A ratio above r means more than r * (len(a) + len(b)) / 2 matched characters, so the LCS is at
+    least that long and the indel distance is below (1 - r) * (len(a) + len(b)).
+    """
+    slack = 1 - threshold
+    found = []
+    stack = [root] if root else []
+    while stack:
+        key, masks, order, _, children = stack.pop()
+        distance = indel_distance(query, key, masks)
+        if distance < slack * (len(query) + len(key)):
+            found.append((order, key))
+        # Triangle inequality: everything under the edge k is at least |distance - k| from the query
+        for k, child in children.items():
+            if abs(distance - k) < slack * (len(query) + child[3]):
+                stack.append(child)
+    return found
+
+def fuzzy_key_lookup(table, query, threshold):
+    """Closest key of a FUZZY_KEY_TABLES table by SequenceMatcher ratio, if above threshold.
+
+    Same answer as ratio-scanning every key (the first key wins ties), but only the BK-tree's
+    candidates get a ratio.
+    """
+    if table not in FUZZY_KEY_INDEXES:
+        FUZZY_KEY_INDEXES[table] = build_bk_tree(list(FUZZY_KEY_TABLES[table].keys()))
+    best_match = None
+    best_score = 0
+    with match_tier(f"{table}_lookup", 'bk_tree') as tier:
+        for _, key in sorted(fuzzy_key_candidates(FUZZY_KEY_INDEXES[table], query, threshold)):
+            score = similarity_score(query, key)
+            if score > best_score:
+                best_score = score
+                best_match = key
+        tier['resolved'] = best_score > threshold
+    return best_match if best_score > threshold else None
+
 def find_concept_match(query):
     """
     Find the best matching concept for a query using synonyms and fuzzy matching.
@@ -3843,91 +5019,114 @@ def find_concept_match(query):
     query = query.lower().strip()
 
     # 1. Check exact match in main concepts
-    if query in HOCKEY_CONCEPTS:
-        return query, HOCKEY_CONCEPTS[query]
-
     # 2. Check exact match in additional concepts
-    if query in ADDITIONAL_CONCEPTS:
-        return query, ADDITIONAL_CONCEPTS[query]
+    with match_tier('find_concept_match', 'exact') as tier:
+        if query in HOCKEY_CONCEPTS:
+            tier['resolved'] = True
+            return query, HOCKEY_CONCEPTS[query]
+
+        if query in ADDITIONAL_CONCEPTS:
+            tier['resolved'] = True
+            return query, ADDITIONAL_CONCEPTS[query]
 
     # 3. Check exact match in hockey dictionary (convert spaces to underscores)
-    dict_key = query.replace(' ', '_').replace('-', '_')
-    if dict_key in HOCKEY_DICTIONARY:
-        # Return dictionary entry formatted as a concept
-        dict_entry = HOCKEY_DICTIONARY[dict_key]
-        return dict_key, {
-            'definition': dict_entry['definition'],
-            'category': dict_entry.get('category', 'general'),
-            'from_dictionary': True
-        }
+    with match_tier('find_concept_match', 'dictionary') as tier:
+        dict_key = query.replace(' ', '_').replace('-', '_')
+        if dict_key in HOCKEY_DICTIONARY:
+            # Return dictionary entry formatted as a concept
+            dict_entry = HOCKEY_DICTIONARY[dict_key]
+            tier['resolved'] = True
+            return dict_key, {
+                'definition': dict_entry['definition'],
+                'category': dict_entry.get('category', 'general'),
+                'from_dictionary': True
+            }
 
     # 4. Check synonym mappings
-    for concept, synonyms in CONCEPT_SYNONYMS.items():
-        if query in [s.lower() for s in synonyms]:
-            if concept in HOCKEY_CONCEPTS:
-                return concept, HOCKEY_CONCEPTS[concept]
-            elif concept in ADDITIONAL_CONCEPTS:
-                return concept, ADDITIONAL_CONCEPTS[concept]
+    with match_tier('find_concept_match', 'synonym') as tier:
+        for concept, synonyms in CONCEPT_SYNONYMS.items():
+            if query in [s.lower() for s in synonyms]:
+                if concept in HOCKEY_CONCEPTS:
+                    tier['resolved'] = True
+                    return concept, HOCKEY_CONCEPTS[concept]
+                elif concept in ADDITIONAL_CONCEPTS:
+                    tier['resolved'] = True
+                    return concept, ADDITIONAL_CONCEPTS[concept]
 
     # 5. Fuzzy match against all concepts, additional concepts, AND dictionary
     best_match = None
     best_score = 0.0
+    best_tier = None
+    ratio_calls_before = getattr(_match_local, 'ratio_calls', 0)
 
-    all_concepts = {**HOCKEY_CONCEPTS, **ADDITIONAL_CONCEPTS}
-
-    for concept, data in all_concepts.items():
-        # Check concept name similarity
-        score = similarity_score(query, concept)
-        if score > best_score:
-            best_score = score
-            best_match = (concept, data)
+    with match_tier('find_concept_match', 'fuzzy_concept'):
+        all_concepts = {**HOCKEY_CONCEPTS, **ADDITIONAL_CONCEPTS}
 
-        # Check if query is in definition
-        if query in data.get('definition', '').lower():
-            if score < 0.5:  # Boost score if found in definition
-                score = 0.6
-                if score > best_score:
-                    best_score = score
-                    best_match = (concept, data)
+        for concept, data in all_concepts.items():
+            # Check concept name similarity
+            score = similarity_score(query, concept)
+            if score > best_score:
+                best_score = score
+                best_match = (concept, data)
+                best_tier = 'fuzzy_concept'
+
+            # Check if query is in definition
+            if query in data.get('definition', '').lower():
+                if score < 0.5:  # Boost score if found in definition
+                    score = 0.6
+                    if score > best_score:
+                        best_score = score
+                        best_match = (concept, data)
+                        best_tier = 'fuzzy_concept'
 
     # 6. Fuzzy match against dictionary terms
-    for term, data in HOCKEY_DICTIONARY.items():
-        # Check term name similarity (convert underscores to spaces for matching)
-        term_readable = term.replace('_', ' ')
-        score = similarity_score(query, term_readable)
-        if score > best_score:
-            best_score = score
-            best_match = (term, {
-                'definition': data['definition'],
-                'category': data.get('category', 'general'),
-                'from_dictionary': True
-            })
+    with match_tier('find_concept_match', 'fuzzy_dictionary'):
+        for term, data in HOCKEY_DICTIONARY.items():
+            # Check term name similarity (convert underscores to spaces for matching)
+            term_readable = term.replace('_', ' ')
+            score = similarity_score(query, term_readable)
+            if score > best_score:
+                best_score = score
+                best_match = (term, {
+                    'definition': data['definition'],
+                    'category': data.get('category', 'general'),
+                    'from_dictionary': True
+                })
+                best_tier = 'fuzzy_dictionary'
+
+            # Check if query is in definition
+            if query in data.get('definition', '').lower():
+                if score < 0.5:
+                    score = 0.6
+                    if score > best_score:
+                        best_score = score
+                        best_match = (term, {
+                            'definition': data['definition'],
+                            'category': data.get('category', 'general'),
+                            'from_dictionary': True
+                        })
+                        best_tier = 'fuzzy_dictionary'
 
-        # Check if query is in definition
-        if query in data.get('definition', '').lower():
-            if score < 0.5:
-                score = 0.6
+    # 7. Check synonyms with fuzzy matching
+    with match_tier('find_concept_match', 'fuzzy_synonym'):
+        for concept, synonyms in CONCEPT_SYNONYMS.items():
+            for synonym in synonyms:
+                score = similarity_score(query, synonym)
                 if score > best_score:
                     best_score = score
-                    best_match = (term, {
-                        'definition': data['definition'],
-                        'category': data.get('category', 'general'),
-                        'from_dictionary': True
-                    })
-
-    # 7. Check synonyms with fuzzy matching
-    for concept, synonyms in CONCEPT_SYNONYMS.items():
-        for synonym in synonyms:
-            score = similarity_score(query, synonym)
-            if score > best_score:
-                best_score = score
-                if concept in HOCKEY_CONCEPTS:
-                    best_match = (concept, HOCKEY_CONCEPTS[concept])
-                elif concept in ADDITIONAL_CONCEPTS:
-                    best_match = (concept, ADDITIONAL_CONCEPTS[concept])
+                    if concept in HOCKEY_CONCEPTS:
+                        best_match = (concept, HOCKEY_CONCEPTS[concept])
+                    elif concept in ADDITIONAL_CONCEPTS:
+                        best_match = (concept, ADDITIONAL_CONCEPTS[concept])
+                    best_tier = 'fuzzy_synonym'
 
     # Return match if score is reasonable
-    if best_score >= 0.5 and best_match:
+    accepted = best_score >= 0.5 and best_match
+    record_match_resolution('find_concept_match', best_tier if accepted else None)
+    sample_fuzzy_query('find_concept_match', query, best_match[0] if accepted else None,
+                       best_tier if accepted else None, best_score,
+                       getattr(_match_local, 'ratio_calls', 0) - ratio_calls_before)
+    if accepted:
         return best_match
 
     return None, None
@@ -3937,24 +5136,32 @@ def search_concept(query):
     query = query.lower()
     matches = []
 
-    all_concepts = {**HOCKEY_CONCEPTS, **ADDITIONAL_CONCEPTS}
+    with match_tier('search_concept', 'concept_scan') as tier:
+        all_concepts = {**HOCKEY_CONCEPTS, **ADDITIONAL_CONCEPTS}
 
-    for concept, data in all_concepts.items():
-        if query in concept or query in data.get('definition', '').lower():
-            matches.append(concept)
+        for concept, data in all_concepts.items():
+            if query in concept or query in data.get('definition', '').lower():
+                matches.append(concept)
+        tier['resolved'] = bool(matches)
 
     # Also check dictionary terms
-    for term, data in HOCKEY_DICTIONARY.items():
-        term_readable = term.replace('_', ' ')
-        if query in term_readable or query in data.get('definition', '').lower():
-            if term not in matches:
-                matches.append(term)
+    with match_tier('search_concept', 'dictionary_scan') as tier:
+        found = len(matches)
+        for term, data in HOCKEY_DICTIONARY.items():
+            term_readable = term.replace('_', ' ')
+            if query in term_readable or query in data.get('definition', '').lower():
+                if term not in matches:
+                    matches.append(term)
+        tier['resolved'] = len(matches) > found
 
     # Also check synonyms
-    for concept, synonyms in CONCEPT_SYNONYMS.items():
-        if any(query in s.lower() for s in synonyms):
-            if concept not in matches:
-                matches.append(concept)
+    with match_tier('search_concept', 'synonym_scan') as tier:
+        found = len(matches)
+        for concept, synonyms in CONCEPT_SYNONYMS.items():
+            if any(query in s.lower() for s in synonyms):
+                if concept not in matches:
+                    matches.append(concept)
+        tier['resolved'] = len(matches) > found
 
     return matches
 
@@ -3974,7 +5181,7 @@ def search_player(query):
 def fetch_nhl_teams():
     """Fetch all NHL teams from the API"""
     try:
-        response = requests.get(f"{NHL_API_BASE}/standings/now", timeout=5)
+        response = nhl_get('/standings/now', timeout=5)
         if response.status_code == 200:
             data = response.json()
             teams = []
@@ -3992,7 +5199,7 @@ def fetch_nhl_teams():
 def fetch_team_roster(team_abbrev):
     """Fetch roster for a specific team"""
     try:
-        response = requests.get(f"{NHL_API_BASE}/roster/{team_abbrev}/current", timeout=5)
+        response = nhl_get('/roster/{team}/current', team=team_abbrev, timeout=5)
         if response.status_code == 200:
             data = response.json()
             players = []
@@ -4011,119 +5218,429 @@ def fetch_team_roster(team_abbrev):
         pass
     return []
 
+# Last good fetch_player_details() result per player, served when the API is down
+PLAYER_DETAILS_FALLBACK = {}
+
+def age_from_birth_date(birth_date):
+    """Age in whole years as the archetype rules expect it (0 if unknown)"""
+    age = 0
+    if birth_date:
+        from datetime import datetime
+        try:
+            birth = datetime.strptime(birth_date, '%Y-%m-%d')
+            age = (datetime.now() - birth).days // 365
+        except:
+            age = 25  # Default
+    return age
+
+def parse_player_details(data):
+    """Comparison inputs (bio, career totals, draft) from a /player/{id}/landing response"""
+    # Extract key info
+    first_name = data.get('firstName', {}).get('default', '')
+    last_name = data.get('lastName', {}).get('default', '')
+    position = data.get('position', 'F')
+    team = data.get('currentTeamAbbrev', '')
+    team_name = data.get('fullTeamName', {}).get('default', '')
+
+    # Get age from birth date
+    birth_date = data.get('birthDate', '')
+    age = age_from_birth_date(birth_date)
+
+    # Get career stats
+    career_stats = data.get('featuredStats', {}).get('regularSeason', {}).get('career', {})
+    goals = career_stats.get('goals', 0)
+    assists = career_stats.get('assists', 0)
+    points = career_stats.get('points', 0)
+    games = career_stats.get('gamesPlayed', 0)
+
+    # Get draft info
+    draft = data.get('draftDetails', {})
+    draft_round = draft.get('round', 0)
+    draft_pick = draft.get('pickInRound', 0)
+    draft_year = draft.get('year', 0)
+    draft_overall = draft.get('overallPick', 0)
+
+    # This season's scoring, for shooting percentage
+    season_stats = data.get('featuredStats', {}).get('regularSeason', {}).get('subSeason', {})
+
+    # Height/Weight
+    height = data.get('heightInInches', 72)
+    weight = data.get('weightInPounds', 200)
+
+    return {
+        'id': data.get('playerId'),
+        'name': f"{first_name} {last_name}",
+        'position': position,
+        'team': team,
+        'team_name': team_name,
+        'birth_date': birth_date,
+        'age': age,
+        'goals': goals,
+        'assists': assists,
+        'points': points,
+        'games': games,
+        'draft_year': draft_year,
+        'draft_round': draft_round,
+        'draft_pick': draft_pick,
+        'draft_overall': draft_overall,
+        'height': height,
+        'weight': weight,
+        'season_games': season_stats.get('gamesPlayed', 0),
+        'season_goals': season_stats.get('goals', 0),
+        'season_shots': season_stats.get('shots', 0),
+        'ppg': round(points / games, 2) if games > 0 else 0
+    }
+
 def fetch_player_details(player_id):
     """Fetch detailed player info from NHL API"""
     try:
-        response = requests.get(f"{NHL_API_BASE}/player/{player_id}/landing", timeout=5)
+        response = nhl_get('/player/{player_id}/landing', player_id=player_id, timeout=5)
         if response.status_code == 200:
-            data = response.json()
-
-            # Extract key info
-            first_name = data.get('firstName', {}).get('default', '')
-            last_name = data.get('lastName', {}).get('default', '')
-            position = data.get('position', 'F')
-            team = data.get('currentTeamAbbrev', '')
-            team_name = data.get('fullTeamName', {}).get('default', '')
-
-            # Get age from birth date
-            birth_date = data.get('birthDate', '')
-            age = 0
-            if birth_date:
-                from datetime import datetime
-                try:
-                    birth = datetime.strptime(birth_date, '%Y-%m-%d')
-                    age = (datetime.now() - birth).days // 365
-                except:
-                    age = 25  # Default
-
-            # Get career stats
-            career_stats = data.get('featuredStats', {}).get('regularSeason', {}).get('career', {})
-            goals = career_stats.get('goals', 0)
-            assists = career_stats.get('assists', 0)
-            points = career_stats.get('points', 0)
-            games = career_stats.get('gamesPlayed', 0)
-
-            # Get draft info
-            draft = data.get('draftDetails', {})
-            draft_round = draft.get('round', 0)
-            draft_pick = draft.get('pickInRound', 0)
-            draft_year = draft.get('year', 0)
-            draft_overall = draft.get('overallPick', 0)
-
-            # Height/Weight
-            height = data.get('heightInInches', 72)
-            weight = data.get('weightInPounds', 200)
-
-            return {
-                'name': f"{first_name} {last_name}",
-                'position': position,
-                'team': team,
-                'team_name': team_name,
-                'age': age,
-                'goals': goals,
-                'assists': assists,
-                'points': points,
-                'games': games,
-                'draft_year': draft_year,
-                'draft_round': draft_round,
-                'draft_pick': draft_pick,
-                'draft_overall': draft_overall,
-                'height': height,
-                'weight': weight,
-                'ppg': round(points / games, 2) if games > 0 else 0
-            }
+            details = parse_player_details(response.json())
+            PLAYER_DETAILS_FALLBACK[player_id] = details
+            return details
     except Exception as e:
         print(f"Error fetching player {player_id}: {e}")
-    return None
+    return PLAYER_DETAILS_FALLBACK.get(player_id)
+
+# =============================================================================
+# PRECOMPUTED ARCHETYPES - Landing-page details for every rostered player
+# =============================================================================
+
+# Written by build_archetypes.py; one row per player id in ARCHETYPE_TABLE_FIELDS order
+ARCHETYPE_TABLE_FILE = os.path.join(os.path.dirname(__file__), 'player_archetypes.json')
+
+ARCHETYPE_TABLE_FIELDS = [
+    'name', 'position', 'team', 'team_name', 'birth_date',
+    'goals', 'assists', 'points', 'games',
+    'draft_year', 'draft_round', 'draft_pick', 'draft_overall',
+    'height', 'weight', 'season_games', 'season_goals', 'season_shots', 'archetype'
+]
+
+# player id -> fetch_player_details()-shaped dict plus 'archetype'
+PLAYER_ARCHETYPE_TABLE = {}
+
+def archetype_table_row(details):
+    """Compact row for one player's details, classified"""
+    details = dict(details, archetype=determine_player_archetype(details))
+    return [details.get(field) for field in ARCHETYPE_TABLE_FIELDS]
+
+def details_from_archetype_row(player_id, row):
+    """Rebuild a fetch_player_details() dict from a table row (archetype is reclassified by the caller)"""
+    details = dict(zip(ARCHETYPE_TABLE_FIELDS, row))
+    details['id'] = player_id
+    details['age'] = age_from_birth_date(details['birth_date'])
+    details['ppg'] = round(details['points'] / details['games'], 2) if details['games'] > 0 else 0
+    return details
+
+def load_archetype_table():
+    """Load player_archetypes.json into PLAYER_ARCHETYPE_TABLE (compare works without it, just slower)"""
+    global PLAYER_ARCHETYPE_TABLE
+    try:
+        import json
+        with open(ARCHETYPE_TABLE_FILE, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"No archetype table loaded: {e}")
+        return
+
+    fields = data.get('fields', [])
+    if fields != ARCHETYPE_TABLE_FIELDS:
+        print("Archetype table was built with different fields - rerun build_archetypes.py")
+        return
+    players = [details_from_archetype_row(int(player_id), row) for player_id, row in data.get('players', {}).items()]
+    # Ages move on after the table was built, so classify again rather than trusting the stored one
+    for details, archetype in zip(players, classify_players(players)):
+        details['archetype'] = archetype
+    PLAYER_ARCHETYPE_TABLE = {details['id']: details for details in players}
+    print(f"Loaded archetypes for {len(PLAYER_ARCHETYPE_TABLE)} players")
+    apply_edge_percentiles(SHARKS_EDGE_DATA)
+    build_similar_players_index()
+    clear_compare_cache()
+
+# =============================================================================
+# VECTORIZED ARCHETYPES - determine_player_archetype() over the whole league at once
+# =============================================================================
+
+# Inputs to determine_player_archetype() and the defaults it uses for missing keys
+PLAYER_COLUMN_DEFAULTS = {
+    'position': 'C',
+    'age': 25,
+    'ppg': 0,
+    'games': 0,
+    'goals': 0,
+    'assists': 0,
+    'draft_overall': 100,
+    'weight': 200
+}
+
+def player_columns(players):
+    """Columnar copy of a list of player dicts - one NumPy array per classifier input, plus ids"""
+    columns = {'id': np.array([p.get('id') or 0 for p in players], dtype=np.int64)}
+    for field, default in PLAYER_COLUMN_DEFAULTS.items():
+        values = [p.get(field, default) for p in players]
+        # float64 compares exactly like the scalar code's Python ints and floats
+        columns[field] = np.array(values, dtype=str if field == 'position' else np.float64)
+    return columns
+
+def classify_columns(columns):
+    """Archetype name per row; the rules, in order, are determine_player_archetype()'s"""
+    position = columns['position']
+    age = columns['age']
+    ppg = columns['ppg']
+    games = columns['games']
+    goals = columns['goals']
+    assists = columns['assists']
+    is_defense = position == 'D'
+
+    # np.select takes the first matching rule, like the scalar if-chain
+    rules = [
+        (position == 'G', 'starting_goalie'),
+        (is_defense & (ppg > 0.6), 'offensive_defenseman'),
+        (is_defense, 'shutdown_defenseman'),
+        ((age <= 23) & ((columns['draft_overall'] <= 10) | (ppg > 0.8)), 'young_star'),
+        ((age >= 32) & (games > 500), 'veteran_leader'),
+        ((position == 'C') & (ppg > 0.9), 'elite_center'),
+        ((goals > 0) & (goals > assists * 1.2), 'goal_scorer'),
+        ((assists > 0) & (assists > goals * 1.3), 'playmaker'),
+        ((columns['weight'] > 210) & (ppg > 0.3), 'power_forward'),
+        ((ppg < 0.4) & (games > 100), 'defensive_forward'),
+        (ppg < 0.3, 'grinder')
+    ]
+    names = np.array([name for _, name in rules] + ['goal_scorer'])
+    index = np.select([condition for condition, _ in rules], np.arange(len(rules)), default=len(rules))
+    return names[index]
+
+def classify_players(players):
+    """determine_player_archetype() for every player dict, vectorized when NumPy is available"""
+    if np is None or not players:
+        return [determine_player_archetype(p) for p in players]
+    return classify_columns(player_columns(players)).tolist()
+
+# =============================================================================
+# SIMILAR PLAYERS - Precomputed nearest neighbours over the archetype table
+# =============================================================================
+
+# Neighbours kept per player; /api/similar serves up to this many
+SIMILAR_PLAYERS_MAX_K = 10
+
+# Feature name -> value from (table details, EDGE entry or {}); None when the player has no value
+SIMILARITY_FEATURES = {
+    'ppg': lambda d, e: d['ppg'] if d['games'] > 0 else None,
+    'goal_share': lambda d, e: d['goals'] / (d['goals'] + d['assists']) if d['goals'] + d['assists'] > 0 else None,
+    'height': lambda d, e: d['height'],
+    'weight': lambda d, e: d['weight'],
+    'age': lambda d, e: d['age'],
+    'shooting_pct': lambda d, e: d['season_goals'] / d['season_shots'] if d.get('season_shots') else None,
+    'shot_speed': lambda d, e: e.get('shot_speed', {}).get('value'),
+    'skating_speed': lambda d, e: e.get('skating_speed', {}).get('value'),
+    'speed_bursts': lambda d, e: e.get('speed_bursts', {}).get('value'),
+    'offensive_zone_time': lambda d, e: e.get('zone_time', {}).get('offensive')
+}
+
+# player id -> [(neighbour id, distance), ...], nearest first
+SIMILAR_PLAYERS_INDEX = {}
+
+def position_group(position):
+    """Goalies, defensemen and forwards are only compared within their own group"""
+    return position if position in ('G', 'D') else 'F'
+
+def similarity_matrix(players):
+    """Features per player, z-scored across the league; NaN where a player has no value"""
+    rows = []
+    for details in players:
+        edge = SHARKS_EDGE_DATA.get(str(details['id']), {})
+        rows.append([feature(details, edge) for feature in SIMILARITY_FEATURES.values()])
+    matrix = np.array(rows, dtype=np.float64).reshape(len(rows), len(SIMILARITY_FEATURES))
+    # A feature nobody has (e.g. no EDGE file loaded) can't be standardized - drop it
+    matrix = matrix[:, ~np.isnan(matrix).all(axis=0)]
+    mean = np.nanmean(matrix, axis=0)
+    std = np.nanstd(matrix, axis=0)
+    std[~(std > 0)] = 1
+    return (matrix - mean) / std
+
+def pairwise_distances(matrix):
+    """RMS difference over the features both players have - EDGE metrics only count between players who both have them"""
+    present = ~np.isnan(matrix)
+    values = np.where(present, matrix, 0.0)
+    squares = values * values
+    # sum over shared features of (a - b)^2 = a^2 + b^2 - 2ab, with missing values zeroed out of every term
+    squared = squares @ present.T + present @ squares.T - 2 * (values @ values.T)
+    shared = present.astype(np.float64) @ present.T
+    # Players with no feature in common aren't comparable, not identical
+    distances = np.full(shared.shape, np.inf)
+    comparable = shared > 0
+    distances[comparable] = np.sqrt(np.maximum(squared[comparable], 0) / shared[comparable])
+    return distances
+
+def build_similar_players_index():
+    """Rebuild SIMILAR_PLAYERS_INDEX from PLAYER_ARCHETYPE_TABLE and SHARKS_EDGE_DATA"""
+    global SIMILAR_PLAYERS_INDEX
+    if np is None:
+        print("NumPy is not installed - /api/similar is disabled")
+        return
+    players = list(PLAYER_ARCHETYPE_TABLE.values())
+    if len(players) < 2:
+        print("Archetype table is empty - /api/similar is disabled until build_archetypes.py runs")
+        SIMILAR_PLAYERS_INDEX = {}
+        return
+
+    started = time.perf_counter()
+    distances = pairwise_distances(similarity_matrix(players))
+    groups = np.array([position_group(p['position']) for p in players])
+    distances[groups[:, None] != groups[None, :]] = np.inf
+    np.fill_diagonal(distances, np.inf)
+
+    k = min(SIMILAR_PLAYERS_MAX_K, len(players) - 1)
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    ids = [p['id'] for p in players]
+    index = {}
+    for row, columns in enumerate(nearest):
+        columns = columns[np.argsort(distances[row, columns], kind='stable')]
+        index[ids[row]] = [(ids[c], float(distances[row, c])) for c in columns if np.isfinite(distances[row, c])]
+    SIMILAR_PLAYERS_INDEX = index
+    print(f"Built similar-player index for {len(index)} players in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+def similar_players(player_id, k=5):
+    """The k nearest players to player_id as (details, distance), or None if they're not indexed"""
+    neighbours = SIMILAR_PLAYERS_INDEX.get(player_id)
+    if neighbours is None:
+        return None
+    return [(PLAYER_ARCHETYPE_TABLE[n], distance) for n, distance in neighbours[:k]]
+
+# =============================================================================
+# EDGE PERCENTILES - Shooting percentiles ranked against the archetype table
+# =============================================================================
+
+# EDGE 'shooting' key -> archetype table field holding every skater's season total.
+# Tracking metrics (shot speed, bursts...) have no league-wide source, so they keep the NHL's snapshot percentiles.
+EDGE_LEAGUE_METRICS = {
+    'shots': 'season_shots',
+    'goals': 'season_goals'
+}
+
+# Below this many skaters a ranking says more about the table than the league - keep the snapshot
+EDGE_MIN_LEAGUE_PLAYERS = 100
+
+def league_distributions(edge_players):
+    """Sorted season totals per metric for every skater, with the EDGE file's live counts swapped in"""
+    distributions = {}
+    for metric, field in EDGE_LEAGUE_METRICS.items():
+        values = {
+            player_id: details.get(field) or 0
+            for player_id, details in PLAYER_ARCHETYPE_TABLE.items()
+            if details['position'] != 'G' and details.get('season_games')
+        }
+        for player_id, entry in edge_players.items():
+            if entry.get('position') != 'G' and metric in entry.get('shooting', {}):
+                values[int(player_id)] = entry['shooting'][metric]
+        distributions[metric] = np.sort(np.array(list(values.values()), dtype=np.float64))
+    return distributions
+
+def percentile_ranks(distribution, values):
+    """Percentile of each value in a sorted distribution - ties count half, so the league median is 50"""
+    values = np.asarray(values, dtype=np.float64)
+    below = np.searchsorted(distribution, values, side='left')
+    at_or_below = np.searchsorted(distribution, values, side='right')
+    return np.round((below + at_or_below) / 2 / len(distribution) * 100, 1)
+
+def apply_edge_percentiles(edge_players):
+    """Recompute shots/goals percentiles in EDGE player entries, in place; returns how many were updated"""
+    if np is None:
+        return 0
+    updated = 0
+    for metric, distribution in league_distributions(edge_players).items():
+        if len(distribution) < EDGE_MIN_LEAGUE_PLAYERS:
+            continue
+        blocks = [entry['shooting'] for entry in edge_players.values()
+                  if entry.get('position') != 'G' and metric in entry.get('shooting', {})]
+        for block, rank in zip(blocks, percentile_ranks(distribution, [b[metric] for b in blocks]).tolist()):
+            block[f'{metric}_percentile'] = rank
+        updated = max(updated, len(blocks))
+    return updated
+
+def precomputed_player_details(player_id):
+    """Details from the archetype table, or None if the player isn't in it"""
+    details = PLAYER_ARCHETYPE_TABLE.get(player_id)
+    record_cache('archetype_table', details is not None)
+    return details
 
 def search_nhl_player(query):
     """Search for an NHL player using the cached roster data - prioritizes full name matches"""
-    global NHL_ROSTER_CACHE, NHL_ROSTER_LOADED
-
     # Load cache if not already loaded
     if not NHL_ROSTER_LOADED:
         load_all_nhl_rosters()
 
-    query = query.lower().strip()
+    # Folded like the roster's name keys, so 'maatta' finds Määttä and 'jt miller' finds J.T. Miller
+    query = fold_name(query)
+
+    # Exact full name (nicknames allowed) or exact last name - a dict hit, no scan
+    with match_tier('search_nhl_player', 'exact_index') as tier:
+        index = roster_name_index()
+        exact = index['names'].get(name_alias_key(query)) or index['last_names'].get(query)
+        tier['resolved'] = bool(exact)
+    if exact:
+        return sorted(exact, key=lambda p: p.name)
+
     query_parts = query.split()
     scored_matches = []
-
-    # Search the cache with scoring system
-    for player in NHL_ROSTER_CACHE:
-        player_name = player.get('name', '').lower()
-        first_name = player.get('first_name', '').lower()
-        last_name = player.get('last_name', '').lower()
-        score = 0
-
-        # Exact full name match - highest priority
-        if query == player_name:
-            score = 100
-        # Query has multiple words (likely first + last name)
-        elif len(query_parts) >= 2:
-            # Check if both parts match
-            first_match = query_parts[0] in first_name or first_name.startswith(query_parts[0])
-            last_match = query_parts[-1] in last_name or last_name.startswith(query_parts[-1])
-            if first_match and last_match:
-                score = 95
-            elif query in player_name:
-                score = 90
-        # Single word query - require exact last name or very close match
-        elif len(query_parts) == 1:
-            if query == last_name:  # Exact last name match
-                score = 85
-            elif query == first_name and len(query) >= 4:  # Exact first name (4+ chars)
-                score = 50  # Lower priority - might be many matches
-            elif similarity_score(query, last_name) > 0.9:  # Very close last name
-                score = 75
-            elif similarity_score(query, player_name) > 0.85:  # Very close full name
-                score = 70
-            # Don't match partial first names to avoid "connor" matching many players
-
-        if score > 0:
-            scored_matches.append((score, player))
+    ratio_calls_before = getattr(_match_local, 'ratio_calls', 0)
+
+    with match_tier('search_nhl_player', 'roster_scan') as tier:
+        # Search the cache with scoring system
+        for player in NHL_ROSTER_CACHE:
+            player_name = player.name_key
+            first_name = player.first_key
+            last_name = player.last_key
+            score = 0
+
+            # Exact full name match - highest priority
+            if query == player_name:
+                score = 100
+            # Query has multiple words (likely first + last name)
+            elif len(query_parts) >= 2:
+                # Check if both parts match
+                first_match = query_parts[0] in first_name or first_name.startswith(query_parts[0])
+                last_match = query_parts[-1] in last_name or last_name.startswith(query_parts[-1])
+                if first_match and last_match:
+                    score = 95
+                elif query in player_name:
+                    score = 90
+            # Single word query - require exact last name or very close match
+            elif len(query_parts) == 1:
+                if query == last_name:  # Exact last name match
+                    score = 85
+                elif query == first_name and len(query) >= 4:  # Exact first name (4+ chars)
+                    score = 50  # Lower priority - might be many matches
+                elif similarity_score(query, last_name) > 0.9:  # Very close last name
+                    score = 75
+                elif similarity_score(query, player_name) > 0.85:  # Very close full name
+                    score = 70
+                # Don't match partial first names to avoid "connor" matching many players
+
+            if score > 0:
+                scored_matches.append((score, player))
+        tier['resolved'] = bool(scored_matches)
 
     # Sort by score descending and return players
-    scored_matches.sort(key=lambda x: (-x[0], x[1].get('name', '')))
+    scored_matches.sort(key=lambda x: (-x[0], x[1].name))
+    top_tier = 'roster_scan'
+
+    # Nothing spelled close enough - try names that sound the same
+    if not scored_matches:
+        with match_tier('search_nhl_player', 'phonetic') as tier:
+            # Scores on the scan's 0-100 scale, below every textual match
+            scored_matches = [(int(score * 60), player) for score, player in phonetic_candidates(query)]
+            tier['resolved'] = bool(scored_matches)
+        top_tier = 'phonetic'
+
+    # Single-word misses fall into the SequenceMatcher comparisons
+    ratio_calls = getattr(_match_local, 'ratio_calls', 0) - ratio_calls_before
+    if ratio_calls:
+        top_score, top_player = scored_matches[0] if scored_matches else (0, None)
+        sample_fuzzy_query('search_nhl_player', query, top_player.name if top_player else None,
+                           top_tier if top_player else None, top_score / 100, ratio_calls)
+
     return [m[1] for m in scored_matches]
 
 def determine_player_archetype(player_info):
@@ -4183,9 +5700,30 @@ def determine_player_archetype(player_info):
     # Default to goal scorer for forwards
     return 'goal_scorer'
 
+# 'daily' picks new comps for each player every day, 'fixed' always the same ones, 'random' new ones on every request
+COMPARISON_ROTATION = os.environ.get('COMPARISON_ROTATION', 'daily')
+
+def comparison_seed():
+    """The part of the comparison seed shared by every player, or None when comps are random"""
+    from datetime import datetime
+
+    if COMPARISON_ROTATION == 'random':
+        return None
+    if COMPARISON_ROTATION == 'daily':
+        return datetime.now().strftime('%Y-%m-%d')
+    return ''
+
+def comparison_rng(player_info):
+    """Random source for a player's comps - seeded so the same player gets the same picks"""
+    seed = comparison_seed()
+    if seed is None:
+        return random
+    # str seeds are hashed with SHA-512, so this is stable across processes (unlike hash())
+    return random.Random(f"{player_info.get('id') or player_info.get('name', '')}:{seed}")
+
 def generate_player_comparison(player_info):
     """Generate cross-sport comparisons for any NHL player"""
-    archetype = determine_player_archetype(player_info)
+    archetype = player_info.get('archetype') or determine_player_archetype(player_info)
     arch_data = PLAYER_ARCHETYPES.get(archetype, PLAYER_ARCHETYPES['goal_scorer'])
 
     name = player_info.get('name', 'Unknown')
@@ -4197,11 +5735,12 @@ def generate_player_comparison(player_info):
     assists = player_info.get('assists', 0)
     draft_overall = player_info.get('draft_overall', 0)
 
-    # Randomly pick one comparison per sport from the options
-    soccer_comp = random.choice(arch_data['soccer'])
-    nba_comp = random.choice(arch_data['nba'])
-    nfl_comp = random.choice(arch_data['nfl'])
-    mlb_comp = random.choice(arch_data['mlb'])
+    # Pick one comparison per sport - seeded per player unless COMPARISON_ROTATION is 'random'
+    rng = comparison_rng(player_info)
+    soccer_comp = rng.choice(arch_data['soccer'])
+    nba_comp = rng.choice(arch_data['nba'])
+    nfl_comp = rng.choice(arch_data['nfl'])
+    mlb_comp = rng.choice(arch_data['mlb'])
 
     # Build position description
     pos_map = {'C': 'Center', 'L': 'Left Wing', 'R': 'Right Wing', 'D': 'Defenseman', 'G': 'Goaltender'}
@@ -4370,35 +5909,236 @@ def find_general_answer(query):
     """Find a general hockey answer for common questions"""
     query = query.lower()
 
-    for topic, qa_data in GENERAL_HOCKEY_QA.items():
-        for keyword in qa_data['question_keywords']:
-            if keyword in query:
-                return {
-                    'topic': topic,
-                    'answer': qa_data['answer'],
-                    'soccer': qa_data.get('soccer', ''),
-                    'nba': qa_data.get('nba', ''),
-                    'nfl': qa_data.get('nfl', ''),
-                    'mlb': qa_data.get('mlb', '')
-                }
+    with match_tier('find_general_answer', 'general') as tier:
+        for topic, qa_data in GENERAL_HOCKEY_QA.items():
+            for keyword in qa_data['question_keywords']:
+                if keyword in query:
+                    tier['resolved'] = True
+                    return {
+                        'topic': topic,
+                        'answer': qa_data['answer'],
+                        'soccer': qa_data.get('soccer', ''),
+                        'nba': qa_data.get('nba', ''),
+                        'nfl': qa_data.get('nfl', ''),
+                        'mlb': qa_data.get('mlb', '')
+                    }
 
     return None
 
 # =============================================================================
-# ROUTES
+# RESPONSE COMPRESSION - gzip/brotli negotiated from Accept-Encoding
 # =============================================================================
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+# Responses smaller than this aren't worth compressing
+COMPRESSION_MIN_SIZE = 1024
+
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript'}
+
+# Payloads that never change while the app runs - compressed once, kept in memory
+PRECOMPRESSED_PAYLOADS = {}
+
+# Views registered with @static_payload, warmed by initialize_app()
+STATIC_PAYLOAD_VIEWS = {}
+
+def supported_encodings():
+    """Encodings we can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli else ['gzip']
+
+def parse_accept_encoding(header):
+    """Parse an Accept-Encoding header into {encoding: q-value}"""
+    accepted = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+def choose_encoding(available, accept_encoding=None):
+    """Pick the first encoding from `available` that the client accepts, or None"""
+    if accept_encoding is None:
+        accept_encoding = request.headers.get('Accept-Encoding', '')
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get('*', 0)
+    for encoding in available:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
 
-@app.route('/api/concepts')
-def list_concepts():
-    """Return list of all concepts"""
-    return jsonify({
-        'concepts': get_all_concepts(),
-        'categories': {
-            'rules': ['offside', 'icing', 'the crease', 'blue line'],
+def compress_bytes(body, encoding, best=False):
+    """Compress a body - `best` trades CPU for size and is only used for one-off payloads"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else 5)
+    return gzip.compress(body, compresslevel=9 if best else 6)
+
+def stream_compress(chunks, encoding):
+    """Compress a streamed response chunk by chunk"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+def encode_payload(body, content_type, best=True):
+    """A body with its ETag and every supported encoding, ready for payload_response()"""
+    return {
+        'content_type': content_type,
+        'etag': hashlib.sha1(body).hexdigest()[:16],
+        'encoded': {
+            None: body,
+            **{encoding: compress_bytes(body, encoding, best=best) for encoding in supported_encodings()}
+        }
+    }
+
+def precompress(key, body, content_type):
+    """Compress a static payload with every supported encoding and keep it in memory"""
+    PRECOMPRESSED_PAYLOADS[key] = encode_payload(body, content_type)
+
+def precompressed_response(key, cache_control='no-cache'):
+    """Build a response for a precompressed payload, picking the best accepted encoding"""
+    return payload_response(PRECOMPRESSED_PAYLOADS[key], cache_control)
+
+def payload_response(payload, cache_control='no-cache'):
+    """Serve an encode_payload() result in the best accepted encoding, answering If-None-Match with a 304"""
+    encoding = choose_encoding(supported_encodings())
+    response = app.response_class(payload['encoded'][encoding], content_type=payload['content_type'])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    # Each encoding is a different representation, so it needs its own ETag
+    response.set_etag(f"{payload['etag']}-{encoding}" if encoding else payload['etag'])
+    return response.make_conditional(request)
+
+def static_payload(key):
+    """Decorator for views whose output never changes: run once, then serve precompressed bytes"""
+    def decorator(view):
+        STATIC_PAYLOAD_VIEWS[key] = view
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            record_cache('static_payloads', key in PRECOMPRESSED_PAYLOADS)
+            if key not in PRECOMPRESSED_PAYLOADS:
+                response = app.make_response(view(*args, **kwargs))
+                precompress(key, response.get_data(), response.content_type)
+            return precompressed_response(key)
+        return wrapper
+    return decorator
+
+def warm_static_payloads():
+    """Render and compress every static payload up front so no request pays for it"""
+    for key, view in STATIC_PAYLOAD_VIEWS.items():
+        with app.test_request_context():
+            response = app.make_response(view())
+            precompress(key, response.get_data(), response.content_type)
+    print(f"Precompressed {len(PRECOMPRESSED_PAYLOADS)} static payloads ({', '.join(supported_encodings())})")
+
+@app.after_request
+def compress_response(response):
+    """Compress dynamic responses on the fly (static payloads are already encoded)"""
+    if (response.status_code < 200 or response.status_code >= 300
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    if not response.is_streamed and response.calculate_content_length() < COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = choose_encoding(supported_encodings())
+    response.vary.add('Accept-Encoding')
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        response.response = stream_compress(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compress_bytes(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# =============================================================================
+# BUILT FRONTEND ASSETS - Shell + fingerprinted CSS/JS from build_assets.py
+# =============================================================================
+
+ASSET_DIST_DIR = os.path.join(os.path.dirname(__file__), 'static', 'dist')
+
+ASSET_CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8'
+}
+
+# Fingerprinted filenames never change content, so browsers may cache them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+ASSET_MANIFEST = {}
+
+def load_asset_manifest():
+    """Load the build manifest and precompress every fingerprinted asset"""
+    global ASSET_MANIFEST
+    try:
+        import json
+        with open(os.path.join(ASSET_DIST_DIR, 'manifest.json'), 'r') as f:
+            manifest = json.load(f)
+        for filename in manifest['assets'].values():
+            with open(os.path.join(ASSET_DIST_DIR, filename), 'rb') as f:
+                body = f.read()
+            precompress(f"asset:{filename}", body, ASSET_CONTENT_TYPES[os.path.splitext(filename)[1]])
+        ASSET_MANIFEST = manifest
+        print(f"Loaded {len(manifest['assets'])} built assets")
+    except Exception as e:
+        ASSET_MANIFEST = {}
+        print(f"No built assets, serving inline template: {e}")
+
+# =============================================================================
+# ROUTES
+# =============================================================================
+
+@app.route('/')
+@static_payload('index')
+def index():
+    # Prefer the pre-built shell; fall back to the inline template in dev
+    if ASSET_MANIFEST:
+        with open(os.path.join(ASSET_DIST_DIR, ASSET_MANIFEST['shell']), 'r', encoding='utf-8') as f:
+            return f.read()
+    return render_template('index.html')
+
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    """Serve a fingerprinted CSS/JS file from memory"""
+    if f"asset:{filename}" not in PRECOMPRESSED_PAYLOADS:
+        return jsonify({'error': f"Asset '{filename}' not found"}), 404
+    return precompressed_response(f"asset:{filename}", cache_control=IMMUTABLE_CACHE_CONTROL)
+
+@app.route('/api/concepts')
+@static_payload('concepts')
+def list_concepts():
+    """Return list of all concepts"""
+    return jsonify({
+        'concepts': get_all_concepts(),
+        'categories': {
+            'rules': ['offside', 'icing', 'the crease', 'blue line'],
             'gameplay': ['power play', 'penalty kill', 'face-off', 'line change', 'checking'],
             'scoring': ['hat trick', 'assist', 'one-timer', 'slap shot', 'wrist shot', 'breakaway', 'deke'],
             'situations': ['overtime', 'goalie pull', 'fighting', 'penalty box'],
@@ -4407,6 +6147,7 @@ def list_concepts():
     })
 
 @app.route('/api/players')
+@static_payload('players')
 def list_players():
     """Return list of curated players + note about API search"""
     return jsonify({
@@ -4472,55 +6213,186 @@ def explain_concept(query):
         'message': f"I don't have a specific entry for '{query}', but try these related topics or ask about: {', '.join(all_concepts[:6])}..."
     })
 
-@app.route('/api/compare/<path:player>')
-def compare_player(player):
-    """Compare a hockey player to players in other sports - with NHL API fallback"""
-    player_query = player.lower().strip()
+def curated_headshot_url(name):
+    """Headshot URL for a curated player, if they're on a current NHL roster"""
+    name = fold_name(name)
+    for p in roster_name_index()['names'].get(name_alias_key(name), []):
+        if p.name_key == name:
+            return headshot_url(p.id)
+    return None
 
+def curated_comparison(player_query):
+    """Compare body from the curated write-ups - exact name, then fuzzy; None if neither matches"""
     # 1. Check curated comparisons first (these have detailed, custom write-ups)
     if player_query in PLAYER_COMPARISONS:
-        return jsonify({
+        return {
             'found': True,
             'player': player_query.title(),
             'data': PLAYER_COMPARISONS[player_query],
+            'headshot': curated_headshot_url(player_query),
             'source': 'curated'
-        })
+        }
 
     # 2. Fuzzy search in curated database
     matches = search_player(player_query)
     if matches:
         best_match = matches[0]
-        return jsonify({
+        return {
             'found': True,
             'player': best_match.title(),
             'data': PLAYER_COMPARISONS[best_match],
+            'headshot': curated_headshot_url(best_match),
             'source': 'curated',
             'did_you_mean': [m.title() for m in matches] if len(matches) > 1 else None
-        })
+        }
+    return None
 
-    # 3. Search NHL API for any current player
-    nhl_matches = search_nhl_player(player_query)
-    if nhl_matches:
-        # Get detailed info for the first match
-        best_match = nhl_matches[0]
-        player_details = fetch_player_details(best_match['id'])
-
-        if player_details:
-            comparison_data = generate_player_comparison(player_details)
-            return jsonify({
-                'found': True,
-                'player': player_details['name'],
-                'data': comparison_data,
-                'source': 'nhl_api',
-                'api_note': 'Comparison generated based on player stats and profile'
-            })
+def nhl_comparison(player, best_match, player_details, partial):
+    """Compare body for an NHL roster match, generated from its landing-page details"""
+    if player_details:
+        comparison_data = generate_player_comparison(player_details)
+        return {
+            'found': True,
+            'player': player_details['name'],
+            'data': comparison_data,
+            'headshot': headshot_url(best_match.id),
+            'source': 'nhl_api',
+            'api_note': 'Comparison generated based on player stats and profile',
+            'partial': partial
+        }
 
-    # 4. Not found - provide suggestions
-    return jsonify({
+    # Found the player but the NHL API is down - don't claim they don't exist
+    return {
+        'found': False,
+        'query': player,
+        'player': best_match.name,
+        'source': 'unavailable',
+        'partial': partial,
+        'suggestions': [p.title() for p in list(PLAYER_COMPARISONS.keys())[:8]],
+        'message': f"Live stats for {best_match.name} are temporarily unavailable. Try again in a minute, or pick a featured player."
+    }
+
+def comparison_not_found(player):
+    """Compare body when nobody matches - provide suggestions"""
+    return {
         'found': False,
         'query': player,
         'suggestions': [p.title() for p in list(PLAYER_COMPARISONS.keys())[:8]],
         'message': f"Couldn't find '{player}'. Try searching by full name (first and last). Featured players: {', '.join([p.title() for p in list(PLAYER_COMPARISONS.keys())[:4]])}..."
+    }
+
+# Encoded /api/compare responses by (query, comparison seed); cleared when rosters or the archetype table reload
+COMPARE_RESPONSE_CACHE = OrderedDict()
+COMPARE_RESPONSE_CACHE_SIZE = int(os.environ.get('COMPARE_RESPONSE_CACHE_SIZE', '2000'))
+COMPARE_RESPONSE_LOCK = threading.Lock()
+
+# Memoized compare responses are safe for shared caches until the seed rotates
+COMPARE_CACHE_CONTROL = os.environ.get('COMPARE_CACHE_CONTROL', 'public, max-age=300')
+
+def clear_compare_cache():
+    with COMPARE_RESPONSE_LOCK:
+        COMPARE_RESPONSE_CACHE.clear()
+
+def cached_compare_payload(key):
+    with COMPARE_RESPONSE_LOCK:
+        payload = COMPARE_RESPONSE_CACHE.get(key)
+        if payload is not None:
+            COMPARE_RESPONSE_CACHE.move_to_end(key)
+    record_cache('compare_responses', payload is not None)
+    return payload
+
+def store_compare_payload(key, body):
+    """Encode a compare body once and keep it, evicting the least recently served"""
+    response = jsonify(body)
+    payload = encode_payload(response.get_data(), response.content_type, best=False)
+    with COMPARE_RESPONSE_LOCK:
+        COMPARE_RESPONSE_CACHE[key] = payload
+        while len(COMPARE_RESPONSE_CACHE) > COMPARE_RESPONSE_CACHE_SIZE:
+            COMPARE_RESPONSE_CACHE.popitem(last=False)
+    return payload
+
+@app.route('/api/compare/<path:player>')
+def compare_player(player):
+    """Compare a hockey player to players in other sports - with NHL API fallback"""
+    player_query = player.lower().strip()
+
+    # Comps are a pure function of the query, the seed and the loaded tables - serve repeats from memory
+    seed = comparison_seed()
+    key = (player_query, seed)
+    payload = cached_compare_payload(key) if seed is not None else None
+    if payload:
+        return payload_response(payload, COMPARE_CACHE_CONTROL)
+
+    curated = curated_comparison(player_query)
+    cacheable = seed is not None
+    if curated:
+        body = curated
+    else:
+        # 3. Search NHL API for any current player
+        nhl_matches = search_nhl_player(player_query)
+        if nhl_matches:
+            # Get detailed info for the first match
+            best_match = nhl_matches[0]
+            player_details = precomputed_player_details(best_match.id)
+            if not player_details:
+                # Live details can change (and may be a stale fallback), so don't memoize them
+                player_details = fetch_player_details(best_match.id)
+                cacheable = False
+            body = nhl_comparison(player, best_match, player_details, is_partial())
+        else:
+            # 4. Not found - provide suggestions
+            body = comparison_not_found(player)
+
+    if not cacheable:
+        return jsonify(body)
+    return payload_response(store_compare_payload(key, body), COMPARE_CACHE_CONTROL)
+
+def similar_player_summary(details):
+    return {
+        'id': details['id'],
+        'name': details['name'],
+        'team': details['team'],
+        'position': details['position'],
+        'archetype': details['archetype'],
+        'ppg': details['ppg'],
+        'age': details['age'],
+        'headshot': headshot_url(details['id'])
+    }
+
+@app.route('/api/similar/<path:player>')
+def get_similar_players(player):
+    """Current NHL players whose profile is closest to this one"""
+    if not SIMILAR_PLAYERS_INDEX:
+        # A deploy problem, not a missing player - don't hide it behind found: false
+        return jsonify({
+            'error': 'Similarity index not built',
+            'message': 'The archetype table is missing or empty - run build_archetypes.py, then /api/admin/reload-stats.'
+        }), 503
+
+    k = max(1, min(request.args.get('k', 5, type=int), SIMILAR_PLAYERS_MAX_K))
+    nhl_matches = search_nhl_player(player)
+    if not nhl_matches:
+        return jsonify({
+            'found': False,
+            'query': player,
+            'message': f"Couldn't find '{player}'. Try searching by full name (first and last)."
+        })
+
+    best_match = nhl_matches[0]
+    neighbours = similar_players(best_match.id, k)
+    if neighbours is None:
+        return jsonify({
+            'found': False,
+            'query': player,
+            'player': best_match.name,
+            'message': f"No similarity data for {best_match.name} yet - run build_archetypes.py."
+        })
+
+    return jsonify({
+        'found': True,
+        'player': similar_player_summary(PLAYER_ARCHETYPE_TABLE[best_match.id]),
+        'similar': [dict(similar_player_summary(details), distance=round(distance, 3)) for details, distance in neighbours],
+        'features': list(SIMILARITY_FEATURES)
     })
 
 @app.route('/api/random')
@@ -4600,15 +6472,17 @@ def search():
 
     return jsonify(results)
 
+def nhl_search_payload(matches):
+    """/api/nhl/search body for search_nhl_player() results"""
+    return {
+        'found': len(matches) > 0,
+        'players': [{'name': m.name, 'team': m.team, 'position': m.position} for m in matches[:10]]
+    }
+
 @app.route('/api/nhl/search/<path:query>')
 def search_nhl_api(query):
     """Direct NHL API search for players"""
-    matches = search_nhl_player(query)
-
-    return jsonify({
-        'found': len(matches) > 0,
-        'players': [{'name': m['name'], 'team': m['team'], 'position': m['position']} for m in matches[:10]]
-    })
+    return jsonify(nhl_search_payload(search_nhl_player(query)))
 
 @app.route('/api/admin/refresh-rosters')
 def admin_refresh_rosters():
@@ -4626,15 +6500,265 @@ def admin_refresh_rosters():
             'error': str(e)
         }), 500
 
+@app.route('/api/admin/reload-stats')
+def admin_reload_stats():
+    """Reload the EDGE and archetype files after update_stats.py / build_archetypes.py, rebuilding the similar-player index"""
+    if not admin_request_ok():
+        return jsonify({'error': 'Admin token required'}), 403
+    load_edge_data()
+    load_archetype_table()
+    return jsonify({
+        'edge_players': len(SHARKS_EDGE_DATA),
+        'archetype_players': len(PLAYER_ARCHETYPE_TABLE),
+        'similar_index_players': len(SIMILAR_PLAYERS_INDEX)
+    })
+
+@app.route('/api/admin/match-telemetry')
+def admin_match_telemetry():
+    """Per-tier match counters plus the sampled fuzzy query log"""
+    if not admin_request_ok():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify({
+        'tiers': match_telemetry_snapshot(),
+        'fuzzy_sample_rate': FUZZY_QUERY_SAMPLE_RATE,
+        'fuzzy_queries': list(FUZZY_QUERY_LOG)
+    })
+
+@app.route('/api/admin/upstream')
+def admin_upstream():
+    """Circuit breaker state per NHL endpoint family plus the recent slow calls"""
+    if not admin_request_ok():
+        return jsonify({'error': 'Admin token required'}), 403
+    return jsonify({
+        'breakers': breaker_snapshot(),
+        'thresholds': {
+            'window': BREAKER_WINDOW,
+            'failure_ratio': BREAKER_FAILURE_RATIO,
+            'min_calls': BREAKER_MIN_CALLS,
+            'slow_seconds': BREAKER_SLOW_SECONDS,
+            'cooldown_seconds': BREAKER_COOLDOWN
+        },
+        'slow_call_seconds': SLOW_CALL_SECONDS,
+        'slow_calls': list(SLOW_CALL_LOG)
+    })
+
 @app.route('/api/admin/roster-status')
 def admin_roster_status():
     """Check roster cache status"""
     return jsonify({
         'loaded': NHL_ROSTER_LOADED,
         'player_count': len(NHL_ROSTER_CACHE),
-        'sample_players': [p['name'] for p in NHL_ROSTER_CACHE[:5]] if NHL_ROSTER_CACHE else []
+        'team_count': len({p.team for p in NHL_ROSTER_CACHE}),
+        'sample_players': [p.name for p in NHL_ROSTER_CACHE[:5]] if NHL_ROSTER_CACHE else []
     })
 
+# =============================================================================
+# HEADSHOT THUMBNAILS - AVIF/WebP srcsets from build_headshots.py
+# =============================================================================
+
+HEADSHOT_MANIFEST_FILE = os.path.join(os.path.dirname(__file__), 'static', 'headshots', 'thumbs', 'manifest.json')
+
+HEADSHOT_MANIFEST = {}
+
+# build_headshots.py runs outside the web workers (build step, update_stats.py); each worker
+# notices a new manifest by its mtime, checked at most this often
+HEADSHOT_MANIFEST_CHECK_SECONDS = 30
+HEADSHOT_MANIFEST_STATE = {'mtime': None, 'checked': 0.0}
+
+def load_headshot_manifest():
+    """Load the thumbnail manifest written by build_headshots.py"""
+    global HEADSHOT_MANIFEST
+    try:
+        import json
+        mtime = os.path.getmtime(HEADSHOT_MANIFEST_FILE)
+        with open(HEADSHOT_MANIFEST_FILE, 'r') as f:
+            HEADSHOT_MANIFEST = json.load(f)
+        HEADSHOT_MANIFEST_STATE['mtime'] = mtime
+        print(f"Loaded headshot thumbnails for {len(HEADSHOT_MANIFEST.get('players', {}))} players")
+    except Exception as e:
+        print(f"Could not load headshot manifest: {e}")
+    HEADSHOT_MANIFEST_STATE['checked'] = time.monotonic()
+
+def headshot_manifest():
+    """HEADSHOT_MANIFEST, reloaded first if build_headshots.py has written a new one"""
+    if time.monotonic() - HEADSHOT_MANIFEST_STATE['checked'] >= HEADSHOT_MANIFEST_CHECK_SECONDS:
+        HEADSHOT_MANIFEST_STATE['checked'] = time.monotonic()
+        try:
+            if os.path.getmtime(HEADSHOT_MANIFEST_FILE) != HEADSHOT_MANIFEST_STATE['mtime']:
+                load_headshot_manifest()
+        except OSError:
+            pass
+    return HEADSHOT_MANIFEST
+
+def headshot_sprite_offset(player_id):
+    """CSS pixel offset of a player's cell in the roster sprite sheet"""
+    position = headshot_manifest().get('sprite', {}).get('players', {}).get(str(player_id))
+    return {'x': position[0], 'y': position[1]} if position else None
+
+def headshot_sprite_sheet():
+    """Sprite sheet URLs and dimensions for the roster grid"""
+    sprite = headshot_manifest().get('sprite')
+    if not sprite:
+        return None
+    return {
+        'images': sprite['images'],
+        'cell': sprite['cell'],
+        'width': sprite['width'],
+        'height': sprite['height']
+    }
+
+def headshot_srcset(player_id, size):
+    """srcset strings per format for a headshot at a display size ('grid' or 'card')"""
+    manifest = headshot_manifest()
+    entry = manifest.get('players', {}).get(str(player_id), {}).get(size)
+    if not entry:
+        return None
+    return {
+        fmt: ', '.join(f"{url} {density}x" for url, density in zip(urls, manifest['densities']))
+        for fmt, urls in entry.items()
+    }
+
+# =============================================================================
+# HEADSHOT CACHE - Fetch-and-cache headshots for players without a local photo
+# =============================================================================
+
+HEADSHOT_CACHE_DIR = os.environ.get('HEADSHOT_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'headshot_cache'))
+
+# Total bytes kept on disk; least recently served files are evicted first
+HEADSHOT_CACHE_MAX_BYTES = int(os.environ.get('HEADSHOT_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+
+# Point this at a local stub server in tests
+HEADSHOT_UPSTREAM_URL = os.environ.get('HEADSHOT_UPSTREAM_URL', 'https://assets.nhle.com/mugs/nhl/latest/{player_id}.png')
+
+# 2x the 80px card size
+HEADSHOT_CACHE_PIXELS = 160
+
+HEADSHOT_CACHE_MAX_AGE = 30 * 24 * 3600  # 30 days
+
+def headshot_cache_path(player_id):
+    """On-disk location of a cached headshot (WebP when Pillow is available)"""
+    try:
+        import PIL  # noqa: F401
+        ext = 'webp'
+    except ImportError:
+        ext = 'png'
+    return os.path.join(HEADSHOT_CACHE_DIR, f"{player_id}.{ext}")
+
+def resize_headshot(data):
+    """Square-crop and shrink an upstream PNG; returns the original bytes without Pillow"""
+    try:
+        from PIL import Image
+        import io
+    except ImportError:
+        return data
+    image = Image.open(io.BytesIO(data)).convert('RGBA')
+    side = min(image.size)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    image = image.crop((left, top, left + side, top + side)).resize((HEADSHOT_CACHE_PIXELS, HEADSHOT_CACHE_PIXELS), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=80)
+    return buffer.getvalue()
+
+def evict_headshot_cache():
+    """Delete least recently served headshots until the cache fits its size cap"""
+    entries = []
+    for name in os.listdir(HEADSHOT_CACHE_DIR):
+        # Another worker's in-progress write; removing it would break its os.replace()
+        if name.endswith('.tmp'):
+            continue
+        path = os.path.join(HEADSHOT_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Evicted by another worker since listdir()
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= HEADSHOT_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        total -= size
+
+def fetch_headshot_to_cache(player_id):
+    """Download, resize and store a headshot; returns the cached path or None"""
+    try:
+        resp = upstream_get('headshot', HEADSHOT_UPSTREAM_URL.format(player_id=player_id), timeout=5)
+        if resp.status_code != 200:
+            return None
+        data = resize_headshot(resp.content)
+    except Exception as e:
+        print(f"Error fetching headshot {player_id}: {e}")
+        return None
+
+    os.makedirs(HEADSHOT_CACHE_DIR, exist_ok=True)
+    path = headshot_cache_path(player_id)
+    # Write then rename so concurrent requests never serve a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    evict_headshot_cache()
+    return path
+
+def headshot_url(player_id):
+    """URL the frontend should use for any NHL player's headshot"""
+    return f"/api/headshots/{player_id}"
+
+def open_cached_headshot(player_id):
+    """Open a cached headshot for reading, or None if it isn't cached (or was just evicted)"""
+    path = headshot_cache_path(player_id)
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        # Touch on every hit - mtime is the LRU clock shared by all workers
+        os.utime(path)
+    except FileNotFoundError:
+        # Evicted after we opened it; the open handle still reads the whole file
+        pass
+    return f
+
+def send_headshot(f, player_id):
+    """send_file() for an open headshot - the handle survives eviction, unlike a path"""
+    import mimetypes
+
+    path = headshot_cache_path(player_id)
+    stat = os.fstat(f.fileno())
+    return send_file(
+        f,
+        mimetype=mimetypes.guess_type(path)[0],
+        max_age=HEADSHOT_CACHE_MAX_AGE,
+        conditional=True,
+        # Not mtime - every hit touches it; a refetch os.replace()s in a new inode
+        etag=f"{player_id}-{stat.st_ino}-{stat.st_size}"
+    )
+
+@app.route('/api/headshots/<int:player_id>')
+def get_headshot(player_id):
+    """Serve a cached headshot, fetching it from the NHL on first request"""
+    f = open_cached_headshot(player_id)
+    record_cache('headshot_disk', f is not None)
+    if f is None:
+        # Only fetch for real players so the cache can't be filled with junk ids
+        if player_id not in NHL_ROSTER_BY_ID:
+            return jsonify({'error': f"Unknown player id {player_id}"}), 404
+        if not fetch_headshot_to_cache(player_id):
+            return jsonify({'error': f"No headshot available for {player_id}"}), 404
+        f = open_cached_headshot(player_id)
+        if f is None:
+            # Evicted by another worker before we could open it - let the browser go to the source
+            return redirect(HEADSHOT_UPSTREAM_URL.format(player_id=player_id))
+
+    return send_headshot(f, player_id)
+
 # =============================================================================
 # MEET THE SHARKS ROUTES - Live Data from NHL API
 # =============================================================================
@@ -4643,115 +6767,134 @@ def admin_roster_status():
 SHARKS_LIVE_CACHE = {
     'roster': None,
     'stats': {},
-    'last_updated': None
+    'last_updated': None,
+    'schedule_games': {}  # month -> last good games list, served when the API is down
 }
 
-def fetch_live_sharks_roster():
-    """Fetch current Sharks roster from NHL API with stats"""
-    import requests
+def cached_sharks_roster():
+    """Cached live roster if it's under 10 minutes old, else None"""
     from datetime import datetime
 
-    # Check cache (refresh every 10 minutes)
     if SHARKS_LIVE_CACHE['roster'] and SHARKS_LIVE_CACHE['last_updated']:
         age = (datetime.now() - SHARKS_LIVE_CACHE['last_updated']).seconds
         if age < 600:  # 10 minutes
+            record_cache('sharks_roster', True)
             return SHARKS_LIVE_CACHE['roster']
+    record_cache('sharks_roster', False)
+    return None
 
-    try:
-        # Fetch roster
-        roster_url = "https://api-web.nhle.com/v1/roster/SJS/current"
-        resp = requests.get(roster_url, timeout=10)
-        if resp.status_code != 200:
-            return None
+def parse_sharks_roster(roster_data):
+    """Turn a /roster response into our player dicts; returns (players, {id: NHL headshot URL})"""
+    players = []
+    headshot_urls = {}
+
+    # Process forwards, defensemen, goalies
+    for position_group in ['forwards', 'defensemen', 'goalies']:
+        for player in roster_data.get(position_group, []):
+            player_id = player.get('id')
+            first_name = player.get('firstName', {}).get('default', '')
+            last_name = player.get('lastName', {}).get('default', '')
+            full_name = f"{first_name} {last_name}"
+
+            # Get headshot URL - use local static files for instant loading
+            headshot = f"/static/headshots/{player_id}.png"
+            headshot_urls[player_id] = player.get('headshot', '')
+
+            # Position mapping
+            pos_code = player.get('positionCode', '')
+            position_map = {
+                'C': 'Center', 'L': 'Left Wing', 'R': 'Right Wing',
+                'D': 'Defenseman', 'G': 'Goalie'
+            }
+            position = position_map.get(pos_code, pos_code)
 
-        roster_data = resp.json()
-        players = []
+            players.append({
+                'id': player_id,
+                'name': full_name,
+                'number': player.get('sweaterNumber', 0),
+                'position': position,
+                'position_code': pos_code,
+                'headshot': headshot,
+                'headshot_srcset': headshot_srcset(player_id, 'grid'),
+                'height': player.get('heightInInches', 0),
+                'weight': player.get('weightInPounds', 0),
+                'birth_date': player.get('birthDate', ''),
+                'birth_city': player.get('birthCity', {}).get('default', ''),
+                'birth_country': player.get('birthCountry', ''),
+                'shoots_catches': player.get('shootsCatches', '')
+            })
 
-        # Process forwards, defensemen, goalies
-        for position_group in ['forwards', 'defensemen', 'goalies']:
-            for player in roster_data.get(position_group, []):
-                player_id = player.get('id')
-                first_name = player.get('firstName', {}).get('default', '')
-                last_name = player.get('lastName', {}).get('default', '')
-                full_name = f"{first_name} {last_name}"
-
-                # Get headshot URL - use local static files for instant loading
-                headshot = f"/static/headshots/{player_id}.png"
-
-                # Position mapping
-                pos_code = player.get('positionCode', '')
-                position_map = {
-                    'C': 'Center', 'L': 'Left Wing', 'R': 'Right Wing',
-                    'D': 'Defenseman', 'G': 'Goalie'
-                }
-                position = position_map.get(pos_code, pos_code)
-
-                players.append({
-                    'id': player_id,
-                    'name': full_name,
-                    'number': player.get('sweaterNumber', 0),
-                    'position': position,
-                    'position_code': pos_code,
-                    'headshot': headshot,
-                    'height': player.get('heightInInches', 0),
-                    'weight': player.get('weightInPounds', 0),
-                    'birth_date': player.get('birthDate', ''),
-                    'birth_city': player.get('birthCity', {}).get('default', ''),
-                    'birth_country': player.get('birthCountry', ''),
-                    'shoots_catches': player.get('shootsCatches', '')
-                })
+    # Sort by jersey number
+    players.sort(key=lambda x: x['number'] if x['number'] else 99)
+    return players, headshot_urls
 
-        # Sort by jersey number
-        players.sort(key=lambda x: x['number'] if x['number'] else 99)
+def store_sharks_roster(players, headshot_urls):
+    """Cache a freshly fetched roster"""
+    from datetime import datetime
+
+    # New faces get thumbnails from update_stats.py / build_headshots.py; until then they use headshot_url()
+    SHARKS_LIVE_CACHE['roster'] = players
+    SHARKS_LIVE_CACHE['last_updated'] = datetime.now()
+
+def fetch_live_sharks_roster():
+    """Fetch current Sharks roster from NHL API with stats"""
+    cached = cached_sharks_roster()
+    if cached:
+        return cached
 
-        SHARKS_LIVE_CACHE['roster'] = players
-        SHARKS_LIVE_CACHE['last_updated'] = datetime.now()
+    try:
+        # Fetch roster
+        resp = nhl_get('/roster/{team}/current', team='SJS', timeout=10)
+        if resp.status_code != 200:
+            return SHARKS_LIVE_CACHE['roster']
 
+        players, headshot_urls = parse_sharks_roster(resp.json())
+        store_sharks_roster(players, headshot_urls)
         return players
 
     except Exception as e:
         print(f"Error fetching Sharks roster: {e}")
-        return None
+        # Stale roster beats the curated fallback while the API is down
+        return SHARKS_LIVE_CACHE['roster']
+
+def parse_player_stats(data):
+    """Pull season/career stats and bio fields out of a /player/{id}/landing response"""
+    # Get current season stats
+    featured_stats = data.get('featuredStats', {})
+    current_season = featured_stats.get('regularSeason', {}).get('subSeason', {})
+    career_stats = featured_stats.get('regularSeason', {}).get('career', {})
+
+    # Get draft info
+    draft_details = data.get('draftDetails', {})
+    draft_info = None
+    if draft_details:
+        draft_info = f"Round {draft_details.get('round', '?')}, Pick {draft_details.get('pickInRound', '?')} ({draft_details.get('year', '?')})"
+
+    return {
+        'current_season': current_season,
+        'career': career_stats,
+        'draft': draft_info,
+        'birth_date': data.get('birthDate', ''),
+        'birth_city': data.get('birthCity', {}).get('default', ''),
+        'birth_country': data.get('birthCountry', ''),
+        'height_inches': data.get('heightInInches', 0),
+        'weight_lbs': data.get('weightInPounds', 0),
+        'position': data.get('position', '')
+    }
 
 def fetch_player_stats(player_id):
     """Fetch current season stats for a player"""
-    import requests
-
     # Check cache
+    record_cache('player_stats', player_id in SHARKS_LIVE_CACHE['stats'])
     if player_id in SHARKS_LIVE_CACHE['stats']:
         return SHARKS_LIVE_CACHE['stats'][player_id]
 
     try:
-        url = f"https://api-web.nhle.com/v1/player/{player_id}/landing"
-        resp = requests.get(url, timeout=10)
+        resp = nhl_get('/player/{player_id}/landing', player_id=player_id, timeout=10)
         if resp.status_code != 200:
             return None
 
-        data = resp.json()
-
-        # Get current season stats
-        featured_stats = data.get('featuredStats', {})
-        current_season = featured_stats.get('regularSeason', {}).get('subSeason', {})
-        career_stats = featured_stats.get('regularSeason', {}).get('career', {})
-
-        # Get draft info
-        draft_details = data.get('draftDetails', {})
-        draft_info = None
-        if draft_details:
-            draft_info = f"Round {draft_details.get('round', '?')}, Pick {draft_details.get('pickInRound', '?')} ({draft_details.get('year', '?')})"
-
-        stats = {
-            'current_season': current_season,
-            'career': career_stats,
-            'draft': draft_info,
-            'birth_date': data.get('birthDate', ''),
-            'birth_city': data.get('birthCity', {}).get('default', ''),
-            'birth_country': data.get('birthCountry', ''),
-            'height_inches': data.get('heightInInches', 0),
-            'weight_lbs': data.get('weightInPounds', 0),
-            'position': data.get('position', '')
-        }
-
+        stats = parse_player_stats(resp.json())
         SHARKS_LIVE_CACHE['stats'][player_id] = stats
         return stats
 
@@ -4770,12 +6913,8 @@ def calculate_age(birth_date):
     except:
         return None
 
-@app.route('/api/sharks')
-def get_sharks_roster():
-    """Get all Sharks players with live data from NHL API"""
-    # Try to get live data first
-    live_roster = fetch_live_sharks_roster()
-
+def sharks_roster_payload(live_roster, partial):
+    """/api/sharks body - the live roster with curated roles, or the curated roster if there's no live data"""
     if live_roster:
         players = []
         for player in live_roster:
@@ -4793,15 +6932,19 @@ def get_sharks_roster():
                 'position': player['position'],
                 'role': role,
                 'age': age,
-                'headshot': player['headshot']
+                'headshot': player['headshot'],
+                'headshot_srcset': player['headshot_srcset'],
+                'sprite': headshot_sprite_offset(player['id'])
             })
 
-        return jsonify({
+        return {
             'team': 'San Jose Sharks',
             'players': players,
             'count': len(players),
-            'source': 'live'
-        })
+            'sprite_sheet': headshot_sprite_sheet(),
+            'source': 'live',
+            'partial': partial
+        }
 
     # Fallback to curated data
     players = []
@@ -4816,146 +6959,151 @@ def get_sharks_roster():
         })
     players.sort(key=lambda x: x['number'])
 
-    return jsonify({
+    return {
         'team': 'San Jose Sharks',
         'players': players,
         'count': len(players),
-        'source': 'curated'
-    })
-
-@app.route('/api/sharks/<path:player>')
-def get_shark_player(player):
-    """Get detailed info for a specific Sharks player with live stats"""
-    from difflib import SequenceMatcher
-
-    player_lower = player.lower().strip()
+        'source': 'curated',
+        'partial': partial
+    }
 
-    # Try to find in live roster first
+@app.route('/api/sharks')
+def get_sharks_roster():
+    """Get all Sharks players with live data from NHL API"""
     live_roster = fetch_live_sharks_roster()
-    matched_player = None
+    return jsonify(sharks_roster_payload(live_roster, is_partial()))
 
-    if live_roster:
-        # Try exact match
-        for p in live_roster:
-            if p['name'].lower() == player_lower:
-                matched_player = p
-                break
-
-        # Try fuzzy match
-        if not matched_player:
-            best_score = 0
-            for p in live_roster:
-                score = SequenceMatcher(None, player_lower, p['name'].lower()).ratio()
-                if score > best_score:
-                    best_score = score
-                    matched_player = p
+def match_live_shark(player_lower, live_roster):
+    """Roster entry for a name - exact, else the best fuzzy match scoring 0.6 or more"""
+    if not live_roster:
+        return None
 
-            if best_score < 0.6:
-                matched_player = None
+    # Try exact match
+    for p in live_roster:
+        if p['name'].lower() == player_lower:
+            return p
 
-    if matched_player:
-        # Get live stats
-        stats = fetch_player_stats(matched_player['id'])
+    # Try fuzzy match
+    matched_player = None
+    best_score = 0
+    for p in live_roster:
+        score = SequenceMatcher(None, player_lower, p['name'].lower()).ratio()
+        if score > best_score:
+            best_score = score
+            matched_player = p
 
-        # Get curated info if available
-        name_lower = matched_player['name'].lower()
-        curated = SHARKS_ROSTER.get(name_lower, {})
+    if best_score < 0.6:
+        return None
+    return matched_player
+
+def live_shark_payload(matched_player, stats, partial):
+    """/api/sharks/<player> body for a live roster match, with stats if we have them"""
+    # Get curated info if available
+    name_lower = matched_player['name'].lower()
+    curated = SHARKS_ROSTER.get(name_lower, {})
+
+    # Calculate age
+    age = calculate_age(matched_player['birth_date'])
+
+    # Format height
+    height_in = matched_player.get('height', 0)
+    height_str = f"{height_in // 12}'{height_in % 12}\"" if height_in else None
+
+    # Build response
+    response = {
+        'found': True,
+        'source': 'live',
+        'id': matched_player['id'],
+        'name': matched_player['name'],
+        'number': matched_player['number'],
+        'position': matched_player['position'],
+        'headshot': matched_player['headshot'],
+        'headshot_srcset': headshot_srcset(matched_player['id'], 'card'),
+        'age': age,
+        'height': height_str,
+        'weight': f"{matched_player.get('weight', 0)} lbs" if matched_player.get('weight') else None,
+        'birthplace': f"{matched_player.get('birth_city', '')}, {matched_player.get('birth_country', '')}".strip(', '),
+        'shoots': matched_player.get('shoots_catches', '')
+    }
 
-        # Calculate age
-        age = calculate_age(matched_player['birth_date'])
+    # Add live stats if available
+    if stats:
+        response['draft'] = stats.get('draft', curated.get('draft', 'Undrafted'))
+
+        current = stats.get('current_season', {})
+        if current:
+            if matched_player['position'] == 'Goalie':
+                response['stats'] = {
+                    'games': current.get('gamesPlayed', 0),
+                    'wins': current.get('wins', 0),
+                    'losses': current.get('losses', 0),
+                    'gaa': round(current.get('goalsAgainstAvg', 0), 2),
+                    'save_pct': round(current.get('savePctg', 0) * 100, 1) if current.get('savePctg') else 0,
+                    'shutouts': current.get('shutouts', 0)
+                }
+            else:
+                response['stats'] = {
+                    'games': current.get('gamesPlayed', 0),
+                    'goals': current.get('goals', 0),
+                    'assists': current.get('assists', 0),
+                    'points': current.get('points', 0),
+                    'plus_minus': current.get('plusMinus', 0),
+                    'pim': current.get('pim', 0)
+                }
 
-        # Format height
-        height_in = matched_player.get('height', 0)
-        height_str = f"{height_in // 12}'{height_in % 12}\"" if height_in else None
+        career = stats.get('career', {})
+        if career:
+            if matched_player['position'] == 'Goalie':
+                response['career_stats'] = {
+                    'games': career.get('gamesPlayed', 0),
+                    'wins': career.get('wins', 0),
+                    'gaa': round(career.get('goalsAgainstAvg', 0), 2),
+                    'save_pct': round(career.get('savePctg', 0) * 100, 1) if career.get('savePctg') else 0
+                }
+            else:
+                response['career_stats'] = {
+                    'games': career.get('gamesPlayed', 0),
+                    'goals': career.get('goals', 0),
+                    'assists': career.get('assists', 0),
+                    'points': career.get('points', 0)
+                }
 
-        # Build response
-        response = {
-            'found': True,
-            'source': 'live',
-            'id': matched_player['id'],
-            'name': matched_player['name'],
-            'number': matched_player['number'],
-            'position': matched_player['position'],
-            'headshot': matched_player['headshot'],
-            'age': age,
-            'height': height_str,
-            'weight': f"{matched_player.get('weight', 0)} lbs" if matched_player.get('weight') else None,
-            'birthplace': f"{matched_player.get('birth_city', '')}, {matched_player.get('birth_country', '')}".strip(', '),
-            'shoots': matched_player.get('shoots_catches', '')
+    # Add curated content if available
+    if curated:
+        response['role'] = curated.get('role', 'Roster Player')
+        response['role_description'] = curated.get('role_description', '')
+        response['play_style'] = curated.get('play_style', '')
+        response['fun_fact'] = curated.get('fun_fact', '')
+        response['comparisons'] = {
+            'soccer': curated.get('soccer_comp', {}),
+            'nba': curated.get('nba_comp', {}),
+            'nfl': curated.get('nfl_comp', {}),
+            'mlb': curated.get('mlb_comp', {})
         }
-
-        # Add live stats if available
-        if stats:
-            response['draft'] = stats.get('draft', curated.get('draft', 'Undrafted'))
-
-            current = stats.get('current_season', {})
-            if current:
-                if matched_player['position'] == 'Goalie':
-                    response['stats'] = {
-                        'games': current.get('gamesPlayed', 0),
-                        'wins': current.get('wins', 0),
-                        'losses': current.get('losses', 0),
-                        'gaa': round(current.get('goalsAgainstAvg', 0), 2),
-                        'save_pct': round(current.get('savePctg', 0) * 100, 1) if current.get('savePctg') else 0,
-                        'shutouts': current.get('shutouts', 0)
-                    }
-                else:
-                    response['stats'] = {
-                        'games': current.get('gamesPlayed', 0),
-                        'goals': current.get('goals', 0),
-                        'assists': current.get('assists', 0),
-                        'points': current.get('points', 0),
-                        'plus_minus': current.get('plusMinus', 0),
-                        'pim': current.get('pim', 0)
-                    }
-
-            career = stats.get('career', {})
-            if career:
-                if matched_player['position'] == 'Goalie':
-                    response['career_stats'] = {
-                        'games': career.get('gamesPlayed', 0),
-                        'wins': career.get('wins', 0),
-                        'gaa': round(career.get('goalsAgainstAvg', 0), 2),
-                        'save_pct': round(career.get('savePctg', 0) * 100, 1) if career.get('savePctg') else 0
-                    }
-                else:
-                    response['career_stats'] = {
-                        'games': career.get('gamesPlayed', 0),
-                        'goals': career.get('goals', 0),
-                        'assists': career.get('assists', 0),
-                        'points': career.get('points', 0)
-                    }
-
-        # Add curated content if available
-        if curated:
-            response['role'] = curated.get('role', 'Roster Player')
-            response['role_description'] = curated.get('role_description', '')
-            response['play_style'] = curated.get('play_style', '')
-            response['fun_fact'] = curated.get('fun_fact', '')
-            response['comparisons'] = {
-                'soccer': curated.get('soccer_comp', {}),
-                'nba': curated.get('nba_comp', {}),
-                'nfl': curated.get('nfl_comp', {}),
-                'mlb': curated.get('mlb_comp', {})
-            }
-        else:
-            response['role'] = 'Roster Player'
-            response['role_description'] = f"A key member of the Sharks roster at {matched_player['position']}."
-            response['play_style'] = ''
-            response['fun_fact'] = ''
-            response['comparisons'] = {}
-
-        # Add EDGE data if available
-        player_id_str = str(matched_player['id'])
-        if player_id_str in SHARKS_EDGE_DATA:
-            response['edge'] = SHARKS_EDGE_DATA[player_id_str]
-
-        return jsonify(response)
+    else:
+        response['role'] = 'Roster Player'
+        response['role_description'] = f"A key member of the Sharks roster at {matched_player['position']}."
+        response['play_style'] = ''
+        response['fun_fact'] = ''
+        response['comparisons'] = {}
+
+    # Add EDGE data if available
+    player_id_str = str(matched_player['id'])
+    if player_id_str in SHARKS_EDGE_DATA:
+        response['edge'] = SHARKS_EDGE_DATA[player_id_str]
+
+    # Stats may have been skipped after the roster call used up the budget
+    response['partial'] = partial
+    return response
+
+def curated_shark_payload(player, partial):
+    """/api/sharks/<player> body from SHARKS_ROSTER alone - exact, then fuzzy, then not found"""
+    player_lower = player.lower().strip()
 
     # Fallback to curated data only
     if player_lower in SHARKS_ROSTER:
         info = SHARKS_ROSTER[player_lower]
-        return jsonify({
+        return {
             'found': True,
             'source': 'curated',
             'name': player_lower.title(),
@@ -4973,21 +7121,15 @@ def get_shark_player(player):
                 'nba': info['nba_comp'],
                 'nfl': info['nfl_comp'],
                 'mlb': info['mlb_comp']
-            }
-        })
+            },
+            'partial': partial
+        }
 
     # Try fuzzy match on curated
-    best_match = None
-    best_score = 0
-    for name in SHARKS_ROSTER.keys():
-        score = SequenceMatcher(None, player_lower, name).ratio()
-        if score > best_score:
-            best_score = score
-            best_match = name
-
-    if best_match and best_score > 0.6:
+    best_match = fuzzy_key_lookup('sharks', player_lower, 0.6)
+    if best_match:
         info = SHARKS_ROSTER[best_match]
-        return jsonify({
+        return {
             'found': True,
             'source': 'curated',
             'name': best_match.title(),
@@ -5005,95 +7147,149 @@ def get_shark_player(player):
                 'nba': info['nba_comp'],
                 'nfl': info['nfl_comp'],
                 'mlb': info['mlb_comp']
-            }
-        })
+            },
+            'partial': partial
+        }
 
-    return jsonify({
+    return {
         'found': False,
-        'error': f"Player '{player}' not found in Sharks roster"
-    })
+        'error': f"Player '{player}' not found in Sharks roster",
+        'partial': partial
+    }
+
+@app.route('/api/sharks/<path:player>')
+def get_shark_player(player):
+    """Get detailed info for a specific Sharks player with live stats"""
+    # Try to find in live roster first
+    matched_player = match_live_shark(player.lower().strip(), fetch_live_sharks_roster())
+
+    if matched_player:
+        stats = fetch_player_stats(matched_player['id'])
+        return jsonify(live_shark_payload(matched_player, stats, is_partial()))
+
+    return jsonify(curated_shark_payload(player, is_partial()))
+
+def schedule_months(today):
+    """The current and next month, as the schedule endpoint wants them"""
+    from datetime import timedelta
+    current_month = today.strftime('%Y-%m')
+    next_month = (today.replace(day=1) + timedelta(days=32)).strftime('%Y-%m')
+    return [current_month, next_month]
+
+def schedule_month_games(month, data=None, error=None):
+    """A month's games from a fresh response (`data`), else the last good copy; returns (games, stale).
+
+    Re-raises `error` when there's nothing cached to fall back to.
+    """
+    cache = SHARKS_LIVE_CACHE['schedule_games']
+    if data is not None:
+        cache[month] = data.get('games', [])
+        return cache[month], False
+    if month not in cache:
+        if error:
+            raise error
+        return [], False
+    if error:
+        print(f"Serving cached {month} schedule: {error}")
+    return cache[month], True
+
+def upcoming_games(all_games, today):
+    """Format the next 15 games from raw schedule entries"""
+    from datetime import datetime, timedelta
+
+    # Filter to upcoming games only and format
+    upcoming = []
+    today_str = today.strftime('%Y-%m-%d')
+
+    for game in all_games:
+        game_date = game.get('gameDate', '')
+        if game_date >= today_str:
+            # Determine if home or away
+            home_team = game.get('homeTeam', {})
+            away_team = game.get('awayTeam', {})
+            is_home = home_team.get('commonName', {}).get('default', '') == 'Sharks'
+
+            opponent = away_team if is_home else home_team
+            opponent_name = opponent.get('commonName', {}).get('default', '')
+            opponent_abbrev = opponent.get('abbrev', '')
+
+            # Get team logo
+            opponent_logo = f"https://assets.nhle.com/logos/nhl/svg/{opponent_abbrev}_dark.svg"
+
+            # Parse time
+            start_utc = game.get('startTimeUTC', '')
+            try:
+                game_dt = datetime.strptime(start_utc, '%Y-%m-%dT%H:%M:%SZ')
+                # Convert to PT (Sharks home timezone) - rough conversion
+                game_dt_pt = game_dt - timedelta(hours=8)
+                time_str = game_dt_pt.strftime('%I:%M %p').lstrip('0')
+            except:
+                time_str = 'TBD'
+
+            # Format date nicely
+            try:
+                date_obj = datetime.strptime(game_date, '%Y-%m-%d')
+                date_formatted = date_obj.strftime('%a, %b %d')
+            except:
+                date_formatted = game_date
+
+            # TV broadcast
+            broadcasts = game.get('tvBroadcasts', [])
+            tv = ', '.join([b.get('network', '') for b in broadcasts[:2]]) if broadcasts else ''
+
+            upcoming.append({
+                'date': game_date,
+                'date_formatted': date_formatted,
+                'time': time_str,
+                'opponent': opponent_name,
+                'opponent_abbrev': opponent_abbrev,
+                'opponent_logo': opponent_logo,
+                'is_home': is_home,
+                'venue': game.get('venue', {}).get('default', ''),
+                'tv': tv,
+                'game_state': game.get('gameState', '')
+            })
+
+    # Sort by date and limit to next 15 games
+    upcoming.sort(key=lambda x: x['date'])
+    return upcoming[:15]
 
 @app.route('/api/sharks/schedule')
 def get_sharks_schedule():
     """Get upcoming Sharks games from NHL API"""
-    from datetime import datetime, timedelta
+    from datetime import datetime
 
     try:
         # Get current month and next month schedules
         today = datetime.now()
-        current_month = today.strftime('%Y-%m')
-        next_month = (today.replace(day=1) + timedelta(days=32)).strftime('%Y-%m')
-
         all_games = []
-
-        for month in [current_month, next_month]:
-            url = f"https://api-web.nhle.com/v1/club-schedule/SJS/month/{month}"
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
-                all_games.extend(data.get('games', []))
-
-        # Filter to upcoming games only and format
-        upcoming = []
-        today_str = today.strftime('%Y-%m-%d')
-
-        for game in all_games:
-            game_date = game.get('gameDate', '')
-            if game_date >= today_str:
-                # Determine if home or away
-                home_team = game.get('homeTeam', {})
-                away_team = game.get('awayTeam', {})
-                is_home = home_team.get('commonName', {}).get('default', '') == 'Sharks'
-
-                opponent = away_team if is_home else home_team
-                opponent_name = opponent.get('commonName', {}).get('default', '')
-                opponent_abbrev = opponent.get('abbrev', '')
-
-                # Get team logo
-                opponent_logo = f"https://assets.nhle.com/logos/nhl/svg/{opponent_abbrev}_dark.svg"
-
-                # Parse time
-                start_utc = game.get('startTimeUTC', '')
-                try:
-                    game_dt = datetime.strptime(start_utc, '%Y-%m-%dT%H:%M:%SZ')
-                    # Convert to PT (Sharks home timezone) - rough conversion
-                    game_dt_pt = game_dt - timedelta(hours=8)
-                    time_str = game_dt_pt.strftime('%I:%M %p').lstrip('0')
-                except:
-                    time_str = 'TBD'
-
-                # Format date nicely
+        stale = False
+
+        for month in schedule_months(today):
+            try:
+                # requests' timeout is per socket operation, so re-check the budget before every month
+                # and hand each call only what's left - the budget caps the loop, not each read
+                resp = nhl_get('/club-schedule/{team}/month/{month}', team='SJS', month=month, timeout=budget_timeout(10))
+                games, month_stale = schedule_month_games(month, resp.json() if resp.status_code == 200 else None)
+            except requests.RequestException as e:
                 try:
-                    date_obj = datetime.strptime(game_date, '%Y-%m-%d')
-                    date_formatted = date_obj.strftime('%a, %b %d')
-                except:
-                    date_formatted = game_date
-
-                # TV broadcast
-                broadcasts = game.get('tvBroadcasts', [])
-                tv = ', '.join([b.get('network', '') for b in broadcasts[:2]]) if broadcasts else ''
-
-                upcoming.append({
-                    'date': game_date,
-                    'date_formatted': date_formatted,
-                    'time': time_str,
-                    'opponent': opponent_name,
-                    'opponent_abbrev': opponent_abbrev,
-                    'opponent_logo': opponent_logo,
-                    'is_home': is_home,
-                    'venue': game.get('venue', {}).get('default', ''),
-                    'tv': tv,
-                    'game_state': game.get('gameState', '')
-                })
+                    games, month_stale = schedule_month_games(month, error=e)
+                except requests.RequestException:
+                    # Nothing cached for this month - keep the months we already have
+                    print(f"Skipping {month} schedule: {e}")
+                    mark_partial()
+                    continue
+            all_games.extend(games)
+            stale = stale or month_stale
 
-        # Sort by date and limit to next 15 games
-        upcoming.sort(key=lambda x: x['date'])
-        upcoming = upcoming[:15]
+        upcoming = upcoming_games(all_games, today)
 
         return jsonify({
             'team': 'San Jose Sharks',
             'games': upcoming,
-            'count': len(upcoming)
+            'count': len(upcoming),
+            'stale': stale,
+            'partial': is_partial()
         })
 
     except Exception as e:
@@ -5101,7 +7297,8 @@ def get_sharks_schedule():
         return jsonify({
             'team': 'San Jose Sharks',
             'games': [],
-            'error': str(e)
+            'error': str(e),
+            'partial': is_partial()
         })
 
 # =============================================================================
@@ -5109,6 +7306,7 @@ def get_sharks_schedule():
 # =============================================================================
 
 @app.route('/api/stats')
+@static_payload('stats')
 def get_stats_glossary():
     """Get all stats with basic info"""
     stats = []
@@ -5163,17 +7361,8 @@ def get_stat_detail(stat):
         })
 
     # Try fuzzy match
-    from difflib import SequenceMatcher
-    best_match = None
-    best_score = 0
-
-    for name in STATS_GLOSSARY.keys():
-        score = SequenceMatcher(None, stat_lower, name).ratio()
-        if score > best_score:
-            best_score = score
-            best_match = name
-
-    if best_match and best_score > 0.5:
+    best_match = fuzzy_key_lookup('stats', stat_lower, 0.5)
+    if best_match:
         info = STATS_GLOSSARY[best_match]
         return jsonify({
             'found': True,
@@ -5200,6 +7389,7 @@ def get_stat_detail(stat):
 # =============================================================================
 
 @app.route('/api/dictionary')
+@static_payload('dictionary')
 def get_dictionary():
     """Get all dictionary terms grouped by category"""
     by_category = {}
@@ -5273,17 +7463,8 @@ def get_dictionary_term(term):
         return jsonify(result)
 
     # Try fuzzy match
-    from difflib import SequenceMatcher
-    best_match = None
-    best_score = 0
-
-    for name in HOCKEY_DICTIONARY.keys():
-        score = SequenceMatcher(None, term_lower, name).ratio()
-        if score > best_score:
-            best_score = score
-            best_match = name
-
-    if best_match and best_score > 0.5:
+    best_match = fuzzy_key_lookup('dictionary', term_lower, 0.5)
+    if best_match:
         info = HOCKEY_DICTIONARY[best_match]
         has_analogies = 'soccer' in info
 
@@ -5315,6 +7496,7 @@ def get_dictionary_term(term):
 # =============================================================================
 
 @app.route('/api/rink')
+@static_payload('rink')
 def get_rink_zones():
     """Get all rink zones for the interactive map"""
     zones = []
@@ -5352,17 +7534,8 @@ def get_rink_zone(zone):
         })
 
     # Try fuzzy match
-    from difflib import SequenceMatcher
-    best_match = None
-    best_score = 0
-
-    for name in RINK_ZONES.keys():
-        score = SequenceMatcher(None, zone_lower, name).ratio()
-        if score > best_score:
-            best_score = score
-            best_match = name
-
-    if best_match and best_score > 0.5:
+    best_match = fuzzy_key_lookup('rink', zone_lower, 0.5)
+    if best_match:
         info = RINK_ZONES[best_match]
         return jsonify({
             'found': True,
@@ -5389,6 +7562,11 @@ def initialize_app():
     """Pre-load NHL rosters at startup so searches are instant"""
     print("Initializing Hockey For Dummies...")
     load_all_nhl_rosters()
+    load_archetype_table()
+    build_fuzzy_key_indexes()
+    load_headshot_manifest()
+    load_asset_manifest()
+    warm_static_payloads()
     print("Ready to go!")
 
 # Load rosters when app starts (happens during deployment on Render)
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""ASGI entry point - the live NHL routes on asyncio, everything else through the Flask app.
+
+The sync app holds a worker thread for every NHL API wait, so a slow
+upstream caps throughput at the thread count. Here /api/sharks,
+/api/sharks/<player>, /api/sharks/schedule, /api/compare and
+/api/nhl/search run as coroutines sharing one httpx connection pool, so
+a single process can hold hundreds of upstream waits. They reuse the
+parse and payload functions in app.py, the same caches, circuit
+breakers, deadline budget and metrics. Every other route is passed to
+the Flask app on a thread pool.
+
+    uvicorn async_app:asgi_app --host 0.0.0.0 --port 5051 --workers 2
+    python async_app.py --port 5051
+"""
+
+import argparse
+import asyncio
+import contextvars
+import os
+import time
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags, quote_etag
+
+import app
+
+# Shared by every request in this process
+ASYNC_MAX_CONNECTIONS = int(os.environ.get('ASYNC_MAX_CONNECTIONS', '100'))
+ASYNC_MAX_KEEPALIVE = int(os.environ.get('ASYNC_MAX_KEEPALIVE', '20'))
+
+# Threads for routes that stay on Flask (content, static payloads, admin)
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', '16'))
+
+HTTP_CLIENT = None
+
+# Per-request {'deadline', 'partial'} - a dict so tasks spawned by gather() share it
+REQUEST_STATE = contextvars.ContextVar('request_state')
+
+# In-flight upstream fetches by key, so a cold cache costs one call rather than one per request
+IN_FLIGHT = {}
+
+flask_app = WSGIMiddleware(app.app, workers=WSGI_THREADS)
+
+def get_client():
+    """The shared AsyncClient (created on first use if the server skipped lifespan)"""
+    global HTTP_CLIENT
+    if HTTP_CLIENT is None:
+        HTTP_CLIENT = httpx.AsyncClient(limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS,
+                                                            max_keepalive_connections=ASYNC_MAX_KEEPALIVE))
+    return HTTP_CLIENT
+
+def mark_partial():
+    state = REQUEST_STATE.get(None)
+    if state is not None:
+        state['partial'] = True
+
+def is_partial():
+    state = REQUEST_STATE.get(None)
+    return bool(state and state['partial'])
+
+async def upstream_get(endpoint, url, timeout):
+    """Async twin of app.upstream_get - same budget, breaker, metrics and slow-call log"""
+    state = REQUEST_STATE.get(None)
+    if state is not None:
+        remaining = state['deadline'] - time.perf_counter()
+        if remaining < app.UPSTREAM_MIN_TIMEOUT:
+            mark_partial()
+            raise app.DeadlineExceeded(f"Request budget of {app.REQUEST_DEADLINE_SECONDS}s spent")
+        timeout = min(timeout, remaining)
+    if not app.breaker_allow(endpoint):
+        mark_partial()
+        raise app.UpstreamUnavailable(f"Circuit open for {endpoint}")
+    started = time.perf_counter()
+    try:
+        response = await get_client().get(url, timeout=timeout)
+    except Exception as e:
+        seconds = time.perf_counter() - started
+        app.record_timing('upstream', endpoint, 'error', seconds)
+        app.record_upstream_outcome(endpoint, url, 'error', seconds, error=e)
+        mark_partial()
+        raise
+    seconds = time.perf_counter() - started
+    app.record_timing('upstream', endpoint, response.status_code, seconds)
+    app.record_upstream_outcome(endpoint, url, response.status_code, seconds)
+    if response.status_code >= 500:
+        mark_partial()
+    return response
+
+async def nhl_get(endpoint, timeout=10, **params):
+    return await upstream_get(endpoint, app.nhl_url(endpoint, **params), timeout)
+
+async def shared_fetch(make_coroutine):
+    """Run a single-flight fetch under its own state; returns (result, degraded)"""
+    # The task copied the first caller's context - give it a budget and partial flag of its own
+    state = {'deadline': time.perf_counter() + app.REQUEST_DEADLINE_SECONDS, 'partial': False}
+    REQUEST_STATE.set(state)
+    result = await make_coroutine()
+    return result, state['partial']
+
+async def single_flight(key, make_coroutine, fallback=lambda: None):
+    """Await the in-flight fetch for `key`, starting one if there isn't any.
+
+    Each caller waits at most its own remaining budget and gets fallback() past it.
+    """
+    task = IN_FLIGHT.get(key)
+    if task is None:
+        task = IN_FLIGHT[key] = asyncio.ensure_future(shared_fetch(make_coroutine))
+        task.add_done_callback(lambda _: IN_FLIGHT.pop(key, None))
+    state = REQUEST_STATE.get(None)
+    remaining = None if state is None else max(state['deadline'] - time.perf_counter(), 0)
+    try:
+        # shield() so one caller timing out or disconnecting doesn't cancel the fetch for everyone else
+        result, degraded = await asyncio.wait_for(asyncio.shield(task), remaining)
+    except asyncio.TimeoutError:
+        mark_partial()
+        return fallback()
+    if degraded:
+        mark_partial()
+    return result
+
+# =============================================================================
+# FETCHERS - async versions of the app.py fetch_* functions
+# =============================================================================
+
+async def fetch_live_sharks_roster():
+    cached = app.cached_sharks_roster()
+    if cached:
+        return cached
+
+    async def fetch():
+        try:
+            resp = await nhl_get('/roster/{team}/current', team='SJS', timeout=10)
+            if resp.status_code != 200:
+                return app.SHARKS_LIVE_CACHE['roster']
+            players, headshot_urls = app.parse_sharks_roster(resp.json())
+            app.store_sharks_roster(players, headshot_urls)
+            return players
+        except Exception as e:
+            print(f"Error fetching Sharks roster: {e}")
+            return app.SHARKS_LIVE_CACHE['roster']
+
+    return await single_flight('roster', fetch, lambda: app.SHARKS_LIVE_CACHE['roster'])
+
+async def fetch_player_stats(player_id):
+    app.record_cache('player_stats', player_id in app.SHARKS_LIVE_CACHE['stats'])
+    if player_id in app.SHARKS_LIVE_CACHE['stats']:
+        return app.SHARKS_LIVE_CACHE['stats'][player_id]
+
+    async def fetch():
+        try:
+            resp = await nhl_get('/player/{player_id}/landing', player_id=player_id, timeout=10)
+            if resp.status_code != 200:
+                return None
+            stats = app.parse_player_stats(resp.json())
+            app.SHARKS_LIVE_CACHE['stats'][player_id] = stats
+            return stats
+        except Exception as e:
+            print(f"Error fetching player stats: {e}")
+            return None
+
+    return await single_flight(('stats', player_id), fetch)
+
+async def fetch_player_details(player_id):
+    async def fetch():
+        try:
+            resp = await nhl_get('/player/{player_id}/landing', player_id=player_id, timeout=5)
+            if resp.status_code == 200:
+                details = app.parse_player_details(resp.json())
+                app.PLAYER_DETAILS_FALLBACK[player_id] = details
+                return details
+        except Exception as e:
+            print(f"Error fetching player {player_id}: {e}")
+        return app.PLAYER_DETAILS_FALLBACK.get(player_id)
+
+    return await single_flight(('details', player_id), fetch, lambda: app.PLAYER_DETAILS_FALLBACK.get(player_id))
+
+# =============================================================================
+# ROUTES - same bodies as the Flask views of the same name
+# =============================================================================
+
+async def get_sharks_roster():
+    live_roster = await fetch_live_sharks_roster()
+    return app.sharks_roster_payload(live_roster, is_partial())
+
+async def get_shark_player(player):
+    matched_player = app.match_live_shark(player.lower().strip(), await fetch_live_sharks_roster())
+    if matched_player:
+        stats = await fetch_player_stats(matched_player['id'])
+        return app.live_shark_payload(matched_player, stats, is_partial())
+    return app.curated_shark_payload(player, is_partial())
+
+async def get_sharks_schedule():
+    from datetime import datetime
+
+    try:
+        today = datetime.now()
+        months = app.schedule_months(today)
+        # Both months at once - the sync view fetches them one after the other
+        responses = await asyncio.gather(
+            *(nhl_get('/club-schedule/{team}/month/{month}', team='SJS', month=month, timeout=10) for month in months),
+            return_exceptions=True
+        )
+
+        all_games = []
+        stale = False
+        for month, resp in zip(months, responses):
+            if isinstance(resp, Exception):
+                if not isinstance(resp, (httpx.HTTPError, app.UpstreamUnavailable)):
+                    raise resp
+                try:
+                    games, month_stale = app.schedule_month_games(month, error=resp)
+                except (httpx.HTTPError, app.UpstreamUnavailable):
+                    # Nothing cached for this month - keep the other one
+                    print(f"Skipping {month} schedule: {resp}")
+                    mark_partial()
+                    continue
+            else:
+                games, month_stale = app.schedule_month_games(month, resp.json() if resp.status_code == 200 else None)
+            all_games.extend(games)
+            stale = stale or month_stale
+
+        upcoming = app.upcoming_games(all_games, today)
+        return {
+            'team': 'San Jose Sharks',
+            'games': upcoming,
+            'count': len(upcoming),
+            'stale': stale,
+            'partial': is_partial()
+        }
+
+    except Exception as e:
+        print(f"Error fetching schedule: {e}")
+        return {
+            'team': 'San Jose Sharks',
+            'games': [],
+            'error': str(e),
+            'partial': is_partial()
+        }
+
+def store_compare_payload(key, body):
+    # jsonify() inside needs an app context, which a worker thread doesn't have
+    with app.app.app_context():
+        return app.store_compare_payload(key, body)
+
+async def compare_player(player):
+    player_query = player.lower().strip()
+
+    # Same memo as the Flask view, so both entry points serve one URL the same way
+    seed = app.comparison_seed()
+    key = (player_query, seed)
+    payload = app.cached_compare_payload(key) if seed is not None else None
+    if payload:
+        return payload, app.COMPARE_CACHE_CONTROL
+
+    # Fuzzy matching is CPU work - keep it off the event loop
+    curated = await asyncio.to_thread(app.curated_comparison, player_query)
+    cacheable = seed is not None
+    if curated:
+        body = curated
+    else:
+        nhl_matches = await asyncio.to_thread(app.search_nhl_player, player_query)
+        if nhl_matches:
+            best_match = nhl_matches[0]
+            player_details = app.precomputed_player_details(best_match.id)
+            if not player_details:
+                # Live details can change (and may be a stale fallback), so don't memoize them
+                player_details = await fetch_player_details(best_match.id)
+                cacheable = False
+            body = app.nhl_comparison(player, best_match, player_details, is_partial())
+        else:
+            body = app.comparison_not_found(player)
+
+    if not cacheable:
+        return body
+    return await asyncio.to_thread(store_compare_payload, key, body), app.COMPARE_CACHE_CONTROL
+
+async def search_nhl_api(query):
+    return app.nhl_search_payload(await asyncio.to_thread(app.search_nhl_player, query))
+
+# Flask endpoint name -> coroutine returning a JSON body, or (encode_payload() result, Cache-Control); URL matching uses the Flask url_map so the routes can't drift
+ASYNC_VIEWS = {
+    'get_sharks_roster': get_sharks_roster,
+    'get_shark_player': get_shark_player,
+    'get_sharks_schedule': get_sharks_schedule,
+    'compare_player': compare_player,
+    'search_nhl_api': search_nhl_api
+}
+
+# =============================================================================
+# ASGI
+# =============================================================================
+
+def match_async_view(scope):
+    """(rule, view, view_args) if the request is for an async route, else None"""
+    if scope['method'] not in ('GET', 'HEAD'):
+        return None
+    adapter = app.app.url_map.bind('localhost')
+    try:
+        rule, view_args = adapter.match(scope['path'], method=scope['method'], return_rule=True)
+    except HTTPException:
+        return None
+    view = ASYNC_VIEWS.get(rule.endpoint)
+    return (rule.rule, view, view_args) if view else None
+
+def encode_json(payload, accept_encoding):
+    """Body and headers as jsonify() + the compress_response hook would produce them"""
+    body = f"{app.app.json.dumps(payload, separators=(',', ':'))}\n".encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'vary', b'Accept-Encoding')]
+    if len(body) >= app.COMPRESSION_MIN_SIZE:
+        encoding = app.choose_encoding(app.supported_encodings(), accept_encoding)
+        if encoding:
+            body = app.compress_bytes(body, encoding)
+            headers.append((b'content-encoding', encoding.encode('ascii')))
+    headers.append((b'content-length', str(len(body)).encode('ascii')))
+    return body, headers
+
+def encoded_payload_response(payload, cache_control, request_headers):
+    """Status, body and headers as app.payload_response() would produce them, 304 included"""
+    encoding = app.choose_encoding(app.supported_encodings(), request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+    # Each encoding is a different representation, so it needs its own ETag
+    etag = f"{payload['etag']}-{encoding}" if encoding else payload['etag']
+    headers = [
+        (b'content-type', payload['content_type'].encode('latin-1')),
+        (b'vary', b'Accept-Encoding'),
+        (b'cache-control', cache_control.encode('latin-1')),
+        (b'etag', quote_etag(etag).encode('latin-1'))
+    ]
+    if parse_etags(request_headers.get(b'if-none-match', b'').decode('latin-1')).contains(etag):
+        return 304, b'', headers
+    body = payload['encoded'][encoding]
+    if encoding:
+        headers.append((b'content-encoding', encoding.encode('ascii')))
+    headers.append((b'content-length', str(len(body)).encode('ascii')))
+    return 200, body, headers
+
+async def handle_async_view(scope, send, rule, view, view_args):
+    started = time.perf_counter()
+    budget = app.ROUTE_DEADLINES.get(rule, app.REQUEST_DEADLINE_SECONDS)
+    REQUEST_STATE.set({'deadline': started + budget if budget else float('inf'), 'partial': False})
+
+    status = 200
+    try:
+        payload = await view(**view_args)
+    except Exception as e:
+        print(f"Error in {rule}: {e}")
+        status, payload = 500, {'error': 'Internal server error'}
+
+    request_headers = dict(scope['headers'])
+    if isinstance(payload, tuple):
+        status, body, headers = encoded_payload_response(*payload, request_headers)
+    else:
+        body, headers = encode_json(payload, request_headers.get(b'accept-encoding', b'').decode('latin-1'))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+    app.record_timing('requests', rule, status, time.perf_counter() - started)
+
+async def lifespan(receive, send):
+    global HTTP_CLIENT
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_client()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if HTTP_CLIENT is not None:
+                await HTTP_CLIENT.aclose()
+                HTTP_CLIENT = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def asgi_app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http':
+        matched = match_async_view(scope)
+        if matched:
+            return await handle_async_view(scope, send, *matched)
+    return await flask_app(scope, receive, send)
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5051)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run('async_app:asgi_app', host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Benchmark the search and explain hot paths against the real content tables.
+
+Replays a fixed query corpus (exact concepts, typos, natural-language
+questions and player names) through the matching functions and the
+Flask routes, then writes ops/sec, latency percentiles and allocation
+figures to a JSON file so runs from different commits can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from urllib.parse import quote
+
+import app
+from perf_stats import percentile
+
+# Query corpus - edit with care, results are only comparable for the same corpus
+EXACT_CONCEPTS = [
+    'icing', 'offside', 'power play', 'penalty kill', 'hat trick', 'zamboni',
+    'one-timer', 'breakaway', 'the crease', 'blue line', 'five hole', 'slap shot'
+]
+
+TYPOS = [
+    'icign', 'ofside', 'powerplay', 'penalty kil', 'hatrick', 'zambonie',
+    'one timmer', 'brekaway', 'five hol', 'slapshot', 'fore check', 'deek'
+]
+
+QUESTIONS = [
+    'how many periods are in a game', 'what is the salary cap', 'how does the draft work',
+    'why do they fight', 'how big is the rink', 'what equipment do players wear',
+    'what happens when the goalie is pulled', 'how long is overtime'
+]
+
+SEARCH_TERMS = ['goal', 'shot', 'penalty', 'zone', 'save', 'line', 'check', 'pass']
+
+# Curated players by full and last name, retired players and names nobody has - all answered
+# locally. Misspellings stay out: they miss the curated match and fall through to the NHL API.
+COMPARE_PLAYERS = [
+    'connor mcdavid', 'wayne gretzky', 'macklin celebrini', 'mcdavid',
+    'gretzky', 'alex ovechkin', 'john nobody'
+]
+
+def player_queries():
+    """Full names, last names and misspelled last names from nhl_rosters.json"""
+    rng = random.Random(42)
+    players = rng.sample(list(app.NHL_ROSTER_CACHE), 12)
+    queries = []
+    for player in players:
+        queries.append(player.name)
+        queries.append(player.last_name)
+        last = player.last_name
+        if len(last) > 4:
+            i = rng.randrange(1, len(last) - 1)
+            queries.append(last[:i] + last[i + 1:])
+    return queries
+
+def build_targets(client):
+    """name -> (callable, corpus)"""
+    concept_corpus = EXACT_CONCEPTS + TYPOS + QUESTIONS
+    return {
+        'find_concept_match': (app.find_concept_match, concept_corpus),
+        'search_concept': (app.search_concept, concept_corpus + SEARCH_TERMS),
+        'search_nhl_player': (app.search_nhl_player, player_queries()),
+        'GET /api/explain': (lambda q: client.get(f"/api/explain/{quote(q)}"), concept_corpus),
+        'GET /api/search': (lambda q: client.get(f"/api/search?q={quote(q)}"), concept_corpus + SEARCH_TERMS),
+        'GET /api/compare': (lambda q: client.get(f"/api/compare/{quote(q)}"), COMPARE_PLAYERS),
+    }
+
+def time_target(func, corpus, rounds):
+    """Call func for every query in the corpus `rounds` times; returns per-call latencies in seconds"""
+    latencies = []
+    for _ in range(rounds):
+        for query in corpus:
+            started = time.perf_counter()
+            func(query)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+def measure_allocations(func, corpus):
+    """Average peak traced bytes and retained bytes per call (separate pass - tracemalloc is slow)"""
+    tracemalloc.start()
+    peak_total = 0
+    baseline = tracemalloc.get_traced_memory()[0]
+    for query in corpus:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func(query)
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return peak_total / len(corpus), retained / len(corpus)
+
+def upstream_call_count():
+    """Upstream calls made so far - the benchmark should never make any"""
+    with app.METRICS_LOCK:
+        return sum(sum(entry['status'].values()) for entry in app.METRICS['upstream'].values())
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def run(rounds, only=None):
+    random.seed(0)
+    client = app.app.test_client()
+    upstream_before = upstream_call_count()
+    results = {}
+
+    for name, (func, corpus) in build_targets(client).items():
+        if only and only not in name:
+            continue
+        time_target(func, corpus, 1)  # warm up
+        latencies = sorted(time_target(func, corpus, rounds))
+        peak_bytes, retained_bytes = measure_allocations(func, corpus)
+        total = sum(latencies)
+        results[name] = {
+            'calls': len(latencies),
+            'ops_per_sec': round(len(latencies) / total, 1) if total else None,
+            'mean_ms': round(total / len(latencies) * 1000, 4),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 4),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+            'max_ms': round(latencies[-1] * 1000, 4),
+            'peak_alloc_bytes_per_call': round(peak_bytes),
+            'retained_bytes_per_call': round(retained_bytes)
+        }
+        print(f"{name:22s} {results[name]['ops_per_sec']:>10} ops/s  "
+              f"p50 {results[name]['p50_ms']:.3f}ms  p95 {results[name]['p95_ms']:.3f}ms  "
+              f"p99 {results[name]['p99_ms']:.3f}ms  {results[name]['peak_alloc_bytes_per_call']} B/call")
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rounds': rounds,
+            'roster_players': len(app.NHL_ROSTER_CACHE),
+            'upstream_calls': upstream_call_count() - upstream_before
+        },
+        'results': results
+    }
+
+def compare(current, baseline_file):
+    """Print the change in ops/sec and p95 against an earlier run"""
+    with open(baseline_file, 'r') as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_file} (commit {baseline['meta'].get('commit')}):")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old or not old.get('ops_per_sec'):
+            continue
+        speedup = result['ops_per_sec'] / old['ops_per_sec']
+        print(f"  {name:22s} {speedup:6.2f}x ops/s   p95 {old['p95_ms']:.3f} -> {result['p95_ms']:.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20, help='passes over the corpus per target')
+    parser.add_argument('--only', help='only run targets whose name contains this string')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    report = run(args.rounds, args.only)
+    if report['meta']['upstream_calls']:
+        # Timings that include the network (and breaker state) aren't comparable - don't save them
+        raise SystemExit(f"{report['meta']['upstream_calls']} upstream calls during the run - timings include network, "
+                         f"results not saved")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
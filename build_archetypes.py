@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Precompute comparison details and archetypes for every rostered NHL player.
+
+Fetches /player/{id}/landing for each player in nhl_rosters.json with a
+bounded number of concurrent requests, classifies them with
+determine_player_archetype(), and writes player_archetypes.json. The app
+loads it at startup so /api/compare answers for any rostered player
+without calling the NHL API. The render build runs it after
+build_headshots.py, and update_stats.py refreshes it before ranking EDGE
+percentiles; the table is a build artifact, never committed.
+
+    python build_archetypes.py --concurrency 8
+
+Players whose fetch fails keep their row from the previous file.
+
+    python build_archetypes.py --verify 100000
+
+checks the vectorized classifier against determine_player_archetype()
+on random players biased towards the rule boundaries, then exits.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+
+import app
+
+_local = threading.local()
+
+def session():
+    """One keep-alive session per worker thread"""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def fetch_details(player_id, retries):
+    """Landing-page details for one player, or None after `retries` extra attempts"""
+    url = app.nhl_url('/player/{player_id}/landing', player_id=player_id)
+    for attempt in range(retries + 1):
+        try:
+            resp = session().get(url, timeout=10)
+            if resp.status_code == 200:
+                return app.parse_player_details(resp.json())
+            if resp.status_code == 404:
+                return None
+        except (requests.RequestException, ValueError):
+            pass
+        # Back off only when another attempt follows
+        if attempt < retries:
+            time.sleep(0.5 * (attempt + 1))
+    return None
+
+# Values on and either side of every threshold in determine_player_archetype()
+BOUNDARY_VALUES = {
+    'age': [0, 18, 22, 23, 24, 25, 31, 32, 33, 40],
+    'ppg': [0, 0.29, 0.3, 0.31, 0.39, 0.4, 0.59, 0.6, 0.61, 0.8, 0.81, 0.9, 0.91, 1.5],
+    'games': [0, 1, 99, 100, 101, 499, 500, 501, 1200],
+    'goals': [0, 1, 5, 6, 10, 12, 13, 50, 400],
+    'assists': [0, 1, 5, 6, 10, 12, 13, 50, 400],
+    'draft_overall': [0, 1, 9, 10, 11, 100, 224],
+    'weight': [170, 200, 209, 210, 211, 240]
+}
+
+def random_player(rng):
+    """A player dict with boundary-heavy values and some keys missing (so defaults are exercised)"""
+    player = {'position': rng.choice(['C', 'L', 'R', 'D', 'G', 'F'])}
+    for field, values in BOUNDARY_VALUES.items():
+        roll = rng.random()
+        if roll < 0.1:
+            continue
+        if roll < 0.7:
+            player[field] = rng.choice(values)
+        elif field == 'ppg':
+            player[field] = round(rng.uniform(0, 1.6), 2)
+        else:
+            player[field] = rng.randint(0, max(values))
+    if rng.random() < 0.05:
+        del player['position']
+    return player
+
+def verify(count, seed=0):
+    """Compare vectorized and scalar classification on `count` random players"""
+    if app.np is None:
+        raise SystemExit("NumPy is not installed - nothing to verify")
+    rng = random.Random(seed)
+    players = [random_player(rng) for _ in range(count)]
+    expected = [app.determine_player_archetype(p) for p in players]
+    started = time.perf_counter()
+    actual = app.classify_players(players)
+    vector_seconds = time.perf_counter() - started
+    mismatches = [(p, e, a) for p, e, a in zip(players, expected, actual) if e != a]
+    for player, e, a in mismatches[:10]:
+        print(f"  MISMATCH {player}: scalar {e}, vectorized {a}")
+    print(f"{count - len(mismatches)}/{count} match ({vector_seconds * 1000:.1f}ms vectorized)")
+
+    league = list(app.PLAYER_ARCHETYPE_TABLE.values())
+    if league:
+        columns = app.player_columns(league)
+        started = time.perf_counter()
+        app.classify_columns(columns)
+        print(f"League reclassification: {len(league)} players in {(time.perf_counter() - started) * 1000:.2f}ms")
+    if mismatches:
+        raise SystemExit(1)
+
+def load_previous(path):
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('fields') == app.ARCHETYPE_TABLE_FIELDS:
+            return data.get('players', {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+def build_table(output=app.ARCHETYPE_TABLE_FILE, concurrency=8, retries=2):
+    """Fetch every rostered player and write the archetype table; returns the rows written"""
+    player_ids = sorted({p.id for p in app.NHL_ROSTER_CACHE if p.id})
+    previous = load_previous(output)
+    print(f"Fetching {len(player_ids)} players from {app.NHL_API_BASE} ({concurrency} at a time)...")
+
+    rows = {}
+    failed = []
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(fetch_details, player_id, retries): player_id for player_id in player_ids}
+        for done, future in enumerate(as_completed(futures), 1):
+            player_id = futures[future]
+            details = future.result()
+            if details:
+                rows[str(player_id)] = app.archetype_table_row(details)
+            elif str(player_id) in previous:
+                rows[str(player_id)] = previous[str(player_id)]
+                failed.append(player_id)
+            else:
+                failed.append(player_id)
+            if done % 100 == 0:
+                print(f"  {done}/{len(player_ids)}")
+
+    table = {
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'fields': app.ARCHETYPE_TABLE_FIELDS,
+        'players': dict(sorted(rows.items()))
+    }
+    # Write then rename so a running app never reads a half-written table
+    tmp_file = output + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(table, f, separators=(',', ':'))
+    os.replace(tmp_file, output)
+
+    archetype_index = app.ARCHETYPE_TABLE_FIELDS.index('archetype')
+    counts = {}
+    for row in rows.values():
+        counts[row[archetype_index]] = counts.get(row[archetype_index], 0) + 1
+    print(f"Classified {len(rows)} players in {time.time() - started:.1f}s")
+    for archetype, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"  {archetype}: {count}")
+    if failed:
+        print(f"  {len(failed)} fetches failed (previous rows kept where available)")
+    print(f"Saved {os.path.getsize(output) // 1024} KB to {output}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=8, help='landing pages fetched at once')
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--output', default=app.ARCHETYPE_TABLE_FILE)
+    parser.add_argument('--verify', type=int, metavar='N', help='check the vectorized classifier on N random players and exit')
+    args = parser.parse_args()
+
+    if args.verify:
+        verify(args.verify)
+        return
+    build_table(args.output, args.concurrency, args.retries)
+
+if __name__ == '__main__':
+    main()
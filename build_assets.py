@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Split templates/index.html into a small HTML shell plus fingerprinted CSS/JS files.
+
+The inline <style> and <script> blocks are written to static/dist/ under
+content-hashed names so browsers can cache them forever, and the shell
+references them by those names. Run this as part of the build; app.py
+serves the shell and assets from memory when static/dist/manifest.json exists.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FILE = os.path.join(BASE_DIR, 'templates', 'index.html')
+DIST_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST_FILE = os.path.join(DIST_DIR, 'manifest.json')
+
+# URL prefix the app serves fingerprinted files under (see /assets/ route in app.py)
+ASSET_URL_PREFIX = '/assets/'
+
+def fingerprint(content):
+    """Short content hash used in asset filenames"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+
+def write_asset(name, ext, content):
+    """Write an asset under its fingerprinted name and return that name"""
+    filename = f"{name}.{fingerprint(content)}.{ext}"
+    with open(os.path.join(DIST_DIR, filename), 'w', encoding='utf-8') as f:
+        f.write(content)
+    return filename
+
+def clean_dist():
+    """Remove assets from previous builds"""
+    for filename in os.listdir(DIST_DIR):
+        if re.match(r'^app\.[0-9a-f]{12}\.(css|js)$', filename) or filename in ('index.html', 'manifest.json'):
+            os.remove(os.path.join(DIST_DIR, filename))
+
+def main():
+    with open(TEMPLATE_FILE, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    style = re.search(r'<style>(.*?)</style>', html, re.S)
+    script = re.search(r'<script>(.*?)</script>', html, re.S)
+    if not style or not script:
+        raise SystemExit("Could not find inline <style> and <script> blocks in index.html")
+
+    os.makedirs(DIST_DIR, exist_ok=True)
+    clean_dist()
+
+    css_file = write_asset('app', 'css', style.group(1).strip() + '\n')
+    js_file = write_asset('app', 'js', script.group(1).strip() + '\n')
+
+    # Keep the tags where the inline blocks were so load order doesn't change
+    shell = html.replace(style.group(0), f'<link rel="stylesheet" href="{ASSET_URL_PREFIX}{css_file}">')
+    shell = shell.replace(script.group(0), f'<script src="{ASSET_URL_PREFIX}{js_file}"></script>')
+
+    with open(os.path.join(DIST_DIR, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(shell)
+
+    manifest = {
+        'shell': 'index.html',
+        'assets': {
+            'app.css': css_file,
+            'app.js': js_file
+        }
+    }
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"Shell: {len(shell) // 1024} KB (was {len(html) // 1024} KB)")
+    print(f"Assets: {css_file}, {js_file}")
+    print(f"Saved manifest to {MANIFEST_FILE}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Generate small AVIF/WebP headshot thumbnails and a manifest for the frontend.
+
+The source PNGs in static/headshots/ are ~336px and up to 180 KB, but the
+roster grid shows them at 60px and the player card at 80px. This writes
+1x/2x thumbnails at those sizes to static/headshots/thumbs/, packs the
+grid thumbnails into a single sprite sheet, and writes a manifest.json
+that app.py turns into srcset strings and sprite offsets.
+
+Run it as a build step (or from update_stats.py), never inside web
+workers: every file is written via a temp file and os.replace(), builds
+are serialized with a lock file, and a replaced sprite sheet is kept for
+SPRITE_GRACE_SECONDS so workers still on the old manifest keep serving it.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import math
+import os
+import sys
+import time
+
+import requests
+from PIL import Image, features
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, 'static', 'headshots')
+THUMB_DIR = os.path.join(SOURCE_DIR, 'thumbs')
+MANIFEST_FILE = os.path.join(THUMB_DIR, 'manifest.json')
+THUMB_URL_PREFIX = '/static/headshots/thumbs/'
+LOCK_FILE = os.path.join(THUMB_DIR, '.build.lock')
+
+# How long a replaced sprite sheet stays on disk - longer than app.py takes to notice a new manifest
+SPRITE_GRACE_SECONDS = 24 * 3600
+
+# Display sizes used by templates/index.html (CSS pixels)
+DISPLAY_SIZES = {
+    'grid': 60,
+    'card': 80
+}
+
+DENSITIES = [1, 2]
+
+# Best compression first - the frontend lists <source> tags in this order
+FORMAT_OPTIONS = {
+    'avif': {'quality': 50, 'speed': 6},
+    'webp': {'quality': 80, 'method': 4}
+}
+
+def available_formats():
+    """Formats this Pillow build can write"""
+    return [fmt for fmt in FORMAT_OPTIONS if features.check(fmt)]
+
+def write_atomic(path, data):
+    """Write bytes via a temp file so readers see the old file or the new one, never half of one"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def encode_image(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt.upper(), **FORMAT_OPTIONS[fmt])
+    return buffer.getvalue()
+
+def source_ids():
+    """Player ids that have a source headshot"""
+    return sorted(name[:-4] for name in os.listdir(SOURCE_DIR) if name.endswith('.png'))
+
+def square_crop(image):
+    """Center-crop an image to a square"""
+    width, height = image.size
+    side = min(width, height)
+    left = (width - side) // 2
+    top = (height - side) // 2
+    return image.crop((left, top, left + side, top + side))
+
+def build_player_thumbnails(player_id, formats, force=False):
+    """Write every size/density/format for one player and return its manifest entry"""
+    source = os.path.join(SOURCE_DIR, f"{player_id}.png")
+    with open(source, 'rb') as f:
+        version = hashlib.sha1(f.read()).hexdigest()[:8]
+
+    entry = {}
+    image = None
+    for size_name, size in DISPLAY_SIZES.items():
+        entry[size_name] = {}
+        for fmt in formats:
+            urls = []
+            for density in DENSITIES:
+                filename = f"{player_id}-{size}@{density}x.{fmt}"
+                path = os.path.join(THUMB_DIR, filename)
+                if force or not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source):
+                    if image is None:
+                        image = square_crop(Image.open(source).convert('RGBA'))
+                    thumb = image.resize((size * density, size * density), Image.LANCZOS)
+                    write_atomic(path, encode_image(thumb, fmt))
+                # Version query busts browser caches when the source photo changes
+                urls.append(f"{THUMB_URL_PREFIX}{filename}?v={version}")
+            entry[size_name][fmt] = urls
+    return entry
+
+def build_sprite(player_ids, formats):
+    """Pack every player's grid thumbnail into one sheet and return its manifest entry.
+
+    Offsets are in CSS pixels; the sheet itself is drawn at the highest density.
+    """
+    cell = DISPLAY_SIZES['grid']
+    scale = max(DENSITIES)
+    columns = max(1, math.ceil(math.sqrt(len(player_ids))))
+    rows = max(1, math.ceil(len(player_ids) / columns))
+
+    sheet = Image.new('RGBA', (columns * cell * scale, rows * cell * scale), (0, 0, 0, 0))
+    positions = {}
+    for index, player_id in enumerate(player_ids):
+        x = (index % columns) * cell
+        y = (index // columns) * cell
+        image = square_crop(Image.open(os.path.join(SOURCE_DIR, f"{player_id}.png")).convert('RGBA'))
+        sheet.paste(image.resize((cell * scale, cell * scale), Image.LANCZOS), (x * scale, y * scale))
+        positions[player_id] = [x, y]
+
+    images = {}
+    for fmt in formats:
+        data = encode_image(sheet, fmt)
+        # Content-hashed name so the sheet can be cached forever
+        filename = f"sprite.{hashlib.sha1(data).hexdigest()[:12]}.{fmt}"
+        write_atomic(os.path.join(THUMB_DIR, filename), data)
+        images[fmt] = f"{THUMB_URL_PREFIX}{filename}"
+
+    return {
+        'cell': cell,
+        'width': columns * cell,
+        'height': rows * cell,
+        'images': images,
+        'players': positions
+    }
+
+def retire_old_sprites(previous, sprite):
+    """Sprite files replaced by this build -> when, deleting the ones retired over SPRITE_GRACE_SECONDS ago"""
+    now = time.time()
+    current = {os.path.basename(url) for url in sprite['images'].values()}
+    retired = {name: retired_at for name, retired_at in previous.get('retired_sprites', {}).items() if name not in current}
+    for url in previous.get('sprite', {}).get('images', {}).values():
+        name = os.path.basename(url)
+        if name not in current:
+            retired.setdefault(name, now)
+
+    for path in glob.glob(os.path.join(THUMB_DIR, 'sprite.*')):
+        name = os.path.basename(path)
+        if name in current or name.endswith('.tmp'):
+            continue
+        # Files no manifest remembers (e.g. from an interrupted build) age out by mtime
+        retired_at = retired.get(name, os.path.getmtime(path))
+        if now - retired_at > SPRITE_GRACE_SECONDS:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            retired.pop(name, None)
+    return {name: retired_at for name, retired_at in retired.items() if os.path.exists(os.path.join(THUMB_DIR, name))}
+
+def build_lock():
+    """Exclusive lock file held for a whole build, so two builds never write the same files"""
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    lock = open(LOCK_FILE, 'w')
+    if fcntl is not None:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+    return lock
+
+def build_thumbnails(force=False):
+    """Build thumbnails and the sprite sheet for every source headshot and write the manifest"""
+    with build_lock():
+        formats = available_formats()
+        player_ids = source_ids()
+
+        players = {}
+        for player_id in player_ids:
+            players[player_id] = build_player_thumbnails(player_id, formats, force)
+
+        sprite = build_sprite(player_ids, formats)
+        manifest = {
+            'sizes': DISPLAY_SIZES,
+            'densities': DENSITIES,
+            'formats': formats,
+            'players': players,
+            'sprite': sprite,
+            'retired_sprites': retire_old_sprites(load_manifest(), sprite)
+        }
+        # Write then rename so a running app never reads a half-written manifest
+        write_atomic(MANIFEST_FILE, json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+def load_manifest():
+    """Current manifest, or an empty one if nothing has been built"""
+    try:
+        with open(MANIFEST_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def download_missing_headshots(headshot_urls):
+    """Fetch source PNGs for players we don't have yet; returns the ids downloaded"""
+    downloaded = []
+    for player_id, url in headshot_urls.items():
+        path = os.path.join(SOURCE_DIR, f"{player_id}.png")
+        if not url or os.path.exists(path):
+            continue
+        try:
+            resp = requests.get(url, timeout=10)
+            if resp.status_code != 200:
+                print(f"  Headshot for {player_id} skipped (HTTP {resp.status_code})")
+                continue
+            write_atomic(path, resp.content)
+            downloaded.append(str(player_id))
+        except Exception as e:
+            print(f"  Headshot for {player_id} failed: {e}")
+    return downloaded
+
+def sync_headshots(headshot_urls):
+    """Download headshots for new roster ids and rebuild if the sprite is missing anyone.
+
+    `headshot_urls` maps player id -> NHL headshot URL (the roster API's `headshot` field).
+    Returns True if the thumbnails and sprite were rebuilt.
+    """
+    downloaded = download_missing_headshots(headshot_urls)
+    sprite_ids = set(load_manifest().get('sprite', {}).get('players', {}))
+    missing = [str(pid) for pid in headshot_urls
+               if str(pid) not in sprite_ids and os.path.exists(os.path.join(SOURCE_DIR, f"{pid}.png"))]
+    if not downloaded and not missing:
+        return False
+    print(f"Rebuilding headshots for new ids: {', '.join(sorted(set(downloaded) | set(missing)))}")
+    build_thumbnails()
+    return True
+
+def main():
+    force = '--force' in sys.argv
+    manifest = build_thumbnails(force=force)
+
+    source_bytes = sum(os.path.getsize(os.path.join(SOURCE_DIR, f"{pid}.png")) for pid in manifest['players'])
+    thumb_bytes = {}
+    for name in os.listdir(THUMB_DIR):
+        ext = os.path.splitext(name)[1][1:]
+        if ext in FORMAT_OPTIONS and not name.startswith('sprite.'):
+            thumb_bytes[ext] = thumb_bytes.get(ext, 0) + os.path.getsize(os.path.join(THUMB_DIR, name))
+
+    print(f"Built thumbnails for {len(manifest['players'])} players ({', '.join(manifest['formats'])})")
+    print(f"  Sprite: {manifest['sprite']['width']}x{manifest['sprite']['height']} ({', '.join(manifest['sprite']['images'].values())})")
+    print(f"  Source PNGs: {source_bytes // 1024} KB")
+    for ext, size in thumb_bytes.items():
+        print(f"  {ext}: {size // 1024} KB")
+    print(f"Saved manifest to {MANIFEST_FILE}")
+
+if __name__ == '__main__':
+    main()
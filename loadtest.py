@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Stepped-concurrency load test with a traffic mix modelled on real usage.
+
+Simulated users loop over weighted scenarios - browsing the roster,
+opening player cards, comparing league players, reading the glossary
+and dictionary, asking explain questions with typos, checking the
+schedule - and each concurrency step reports throughput, latency
+percentiles and error rate. Results go to JSON so runs are comparable.
+
+Against a running app:
+
+    python loadtest.py --base-url http://127.0.0.1:5051 --steps 1,5,10,25
+
+Or spawn the NHL stub plus a gunicorn deployment pointed at it:
+
+    python loadtest.py --spawn --workers 2 --stub-latency-ms 150 --steps 1,10,25,50
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import requests
+
+from perf_stats import percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROSTER_FILE = os.path.join(BASE_DIR, 'nhl_rosters.json')
+
+STATS = ['corsi', 'plus minus', 'save percentage', 'gaa', 'pdo', 'time on ice', 'fenwick', 'points']
+DICTIONARY_TERMS = ['icing', 'five hole', 'biscuit', 'barn', 'celly', 'top shelf', 'bar down', 'grinder']
+RINK_ZONES = ['blue line', 'crease', 'neutral zone', 'slot', 'faceoff circle']
+EXPLAIN_QUERIES = [
+    'icing', 'ofside', 'powerplay', 'penalty kil', 'hatrick', 'zambonie', 'one timmer',
+    'how many periods', 'why do they fight', 'what is the salary cap', 'brekaway', 'goalie pull'
+]
+
+def load_players():
+    with open(ROSTER_FILE, 'r') as f:
+        roster = json.load(f)
+    sharks = [p['name'] for p in roster if p['team'] == 'SJS']
+    league = [p['name'] for p in roster]
+    return sharks, league
+
+def typo(rng, text):
+    """Drop one character from a word, like a hurried phone search"""
+    if len(text) < 5:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1:]
+
+def build_scenarios(sharks, league):
+    """name -> (weight, function(rng) returning the paths one user visit requests)"""
+    return {
+        'roster_browse': (20, lambda rng: ['/api/sharks']),
+        'player_card': (20, lambda rng: ['/api/sharks', f"/api/sharks/{quote(rng.choice(sharks).lower())}"]),
+        'league_compare': (15, lambda rng: [f"/api/compare/{quote(rng.choice(league).lower())}"]),
+        'glossary_browse': (15, lambda rng: ['/api/stats', f"/api/stats/{quote(rng.choice(STATS))}",
+                                             f"/api/rink/{quote(rng.choice(RINK_ZONES))}"]),
+        'dictionary_browse': (10, lambda rng: ['/api/dictionary', f"/api/dictionary/{quote(rng.choice(DICTIONARY_TERMS))}"]),
+        'explain_typos': (12, lambda rng: [f"/api/explain/{quote(typo(rng, rng.choice(EXPLAIN_QUERIES)))}"]),
+        'schedule': (8, lambda rng: ['/api/sharks/schedule']),
+    }
+
+def run_user(base_url, scenarios, seed, stop_at, think_s, timeout, samples, lock):
+    """One closed-loop user: pick a scenario, run its requests, repeat until the step ends"""
+    rng = random.Random(seed)
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip, br'
+    local = []
+    while time.monotonic() < stop_at:
+        scenario = rng.choices(names, weights)[0]
+        for path in scenarios[scenario][1](rng):
+            started = time.perf_counter()
+            try:
+                resp = session.get(base_url + path, timeout=timeout)
+                ok = resp.status_code < 400
+            except requests.RequestException:
+                ok = False
+            local.append((scenario, time.perf_counter() - started, ok))
+            if think_s:
+                time.sleep(rng.uniform(0, 2 * think_s))
+    with lock:
+        samples.extend(local)
+
+def summarize(samples, duration):
+    latencies = sorted(s[1] for s in samples)
+    errors = sum(1 for s in samples if not s[2])
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / duration, 2),
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+def run_step(base_url, scenarios, users, duration, think_s, timeout, seed):
+    samples = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=run_user, args=(base_url, scenarios, seed * 1000 + i, stop_at, think_s, timeout, samples, lock))
+        for i in range(users)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    result = {'users': users, **summarize(samples, elapsed), 'scenarios': {}}
+    for name in scenarios:
+        scenario_samples = [s for s in samples if s[0] == name]
+        if scenario_samples:
+            result['scenarios'][name] = summarize(scenario_samples, elapsed)
+    return result
+
+def wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=2)
+            return True
+        except requests.RequestException:
+            time.sleep(0.25)
+    return False
+
+def spawn(args):
+    """Start the NHL stub and a gunicorn deployment pointed at it; returns (base_url, processes)"""
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(BASE_DIR, 'nhl_stub_server.py'), '--port', str(args.stub_port),
+        '--latency-ms', str(args.stub_latency_ms), '--jitter-ms', str(args.stub_jitter_ms),
+        '--error-rate', str(args.stub_error_rate), '--seed', str(args.seed)
+    ], cwd=BASE_DIR, stdout=subprocess.DEVNULL)
+    stub_base = f"http://127.0.0.1:{args.stub_port}"
+    if not wait_for(f"{stub_base}/__stub/config"):
+        stub.terminate()
+        raise SystemExit("NHL stub did not start")
+
+    env = dict(os.environ,
+               NHL_API_BASE=f"{stub_base}/v1",
+               HEADSHOT_UPSTREAM_URL=f"{stub_base}/mugs/{{player_id}}.png")
+    server = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f"127.0.0.1:{args.app_port}",
+        '--workers', str(args.workers), '--timeout', '120'
+    ], cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    if not wait_for(f"{base_url}/api/concepts", timeout=60):
+        server.terminate()
+        stub.terminate()
+        raise SystemExit("App did not start")
+    return base_url, [server, stub]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:5051')
+    parser.add_argument('--steps', default='1,5,10,25', help='comma-separated concurrent user counts')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per step')
+    parser.add_argument('--think-ms', type=float, default=0, help='mean pause between requests per user')
+    parser.add_argument('--timeout', type=float, default=30, help='client timeout per request')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='loadtest_results.json')
+    parser.add_argument('--spawn', action='store_true', help='start the NHL stub and gunicorn locally')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers with --spawn')
+    parser.add_argument('--app-port', type=int, default=8050)
+    parser.add_argument('--stub-port', type=int, default=8001)
+    parser.add_argument('--stub-latency-ms', type=float, default=100)
+    parser.add_argument('--stub-jitter-ms', type=float, default=50)
+    parser.add_argument('--stub-error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    sharks, league = load_players()
+    scenarios = build_scenarios(sharks, league)
+    steps = [int(s) for s in args.steps.split(',')]
+
+    processes = []
+    base_url = args.base_url.rstrip('/')
+    if args.spawn:
+        base_url, processes = spawn(args)
+
+    results = []
+    try:
+        for users in steps:
+            result = run_step(base_url, scenarios, users, args.duration, args.think_ms / 1000, args.timeout, args.seed)
+            results.append(result)
+            print(f"{users:4d} users  {result['throughput_rps']:8.1f} req/s  p50 {result['p50_ms']:8.1f}ms  "
+                  f"p95 {result['p95_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  errors {result['error_rate']:.2%}")
+    finally:
+        for process in processes:
+            process.terminate()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'base_url': base_url,
+            'duration_per_step': args.duration,
+            'think_ms': args.think_ms,
+            'seed': args.seed,
+            'spawned': args.spawn,
+            'workers': args.workers if args.spawn else None,
+            'stub': {
+                'latency_ms': args.stub_latency_ms,
+                'jitter_ms': args.stub_jitter_ms,
+                'error_rate': args.stub_error_rate
+            } if args.spawn else None,
+            'scenario_weights': {name: weight for name, (weight, _) in scenarios.items()}
+        },
+        'steps': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {args.output}")
+
+if __name__ == '__main__':
+    main()
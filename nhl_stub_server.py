@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Offline stand-in for api-web.nhle.com for load tests and integration tests.
+
+Serves the endpoints the app uses - roster, player landing, club schedule
+and standings - plus headshot images. Responses are synthesized
+deterministically from nhl_rosters.json and sharks_edge_data.json, so
+every rostered player resolves; headshots are the Sharks PNGs on disk,
+or a generated placeholder for any other rostered id.
+
+Latency and failures are injectable for performance work:
+
+    python nhl_stub_server.py --port 8001 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+    NHL_API_BASE=http://127.0.0.1:8001/v1 \\
+    HEADSHOT_UPSTREAM_URL='http://127.0.0.1:8001/mugs/{player_id}.png' gunicorn app:app
+
+Settings can be changed while running:
+
+    curl -X POST localhost:8001/__stub/config -d '{"error_rate": 0.5}'
+"""
+
+import argparse
+import functools
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROSTER_FILE = os.path.join(BASE_DIR, 'nhl_rosters.json')
+EDGE_DATA_FILE = os.path.join(BASE_DIR, 'sharks_edge_data.json')
+HEADSHOT_DIR = os.path.join(BASE_DIR, 'static', 'headshots')
+
+# Same size as the real mugs, so the app's crop-and-resize path does real work
+PLACEHOLDER_PIXELS = 168
+
+TEAM_NAMES = {
+    'ANA': ('Anaheim', 'Ducks'), 'BOS': ('Boston', 'Bruins'), 'BUF': ('Buffalo', 'Sabres'),
+    'CGY': ('Calgary', 'Flames'), 'CAR': ('Carolina', 'Hurricanes'), 'CHI': ('Chicago', 'Blackhawks'),
+    'COL': ('Colorado', 'Avalanche'), 'CBJ': ('Columbus', 'Blue Jackets'), 'DAL': ('Dallas', 'Stars'),
+    'DET': ('Detroit', 'Red Wings'), 'EDM': ('Edmonton', 'Oilers'), 'FLA': ('Florida', 'Panthers'),
+    'LAK': ('Los Angeles', 'Kings'), 'MIN': ('Minnesota', 'Wild'), 'MTL': ('Montréal', 'Canadiens'),
+    'NSH': ('Nashville', 'Predators'), 'NJD': ('New Jersey', 'Devils'), 'NYI': ('New York', 'Islanders'),
+    'NYR': ('New York', 'Rangers'), 'OTT': ('Ottawa', 'Senators'), 'PHI': ('Philadelphia', 'Flyers'),
+    'PIT': ('Pittsburgh', 'Penguins'), 'SJS': ('San Jose', 'Sharks'), 'SEA': ('Seattle', 'Kraken'),
+    'STL': ('St. Louis', 'Blues'), 'TBL': ('Tampa Bay', 'Lightning'), 'TOR': ('Toronto', 'Maple Leafs'),
+    'UTA': ('Utah', 'Mammoth'), 'VAN': ('Vancouver', 'Canucks'), 'VGK': ('Vegas', 'Golden Knights'),
+    'WSH': ('Washington', 'Capitals'), 'WPG': ('Winnipeg', 'Jets')
+}
+
+COUNTRIES = ['CAN', 'USA', 'SWE', 'FIN', 'CZE', 'RUS', 'DEU', 'SVK', 'CHE']
+
+POSITION_GROUPS = {'C': 'forwards', 'L': 'forwards', 'R': 'forwards', 'D': 'defensemen', 'G': 'goalies'}
+
+# Fault injection settings - changed by CLI flags or POST /__stub/config
+CONFIG = {
+    'latency_ms': 0,      # added to every response
+    'jitter_ms': 0,       # uniform +/- on top of latency
+    'error_rate': 0.0,    # fraction of requests answered with error_status
+    'error_status': 503,
+    'slow_rate': 0.0,     # fraction of requests delayed by slow_ms (simulates upstream stalls)
+    'slow_ms': 15000,
+    'seed': 0
+}
+
+CONFIG_LOCK = threading.Lock()
+RNG = random.Random(0)
+
+# path template -> {status: count}
+STATS = {}
+
+ROSTER = []
+ROSTER_IDS = set()
+EDGE = {}
+
+def load_data():
+    """Load the local roster and EDGE files the synthesized responses are built from"""
+    global ROSTER, ROSTER_IDS, EDGE
+    with open(ROSTER_FILE, 'r') as f:
+        ROSTER = json.load(f)
+    ROSTER_IDS = {player['id'] for player in ROSTER}
+    try:
+        with open(EDGE_DATA_FILE, 'r') as f:
+            EDGE = json.load(f).get('players', {})
+    except OSError:
+        EDGE = {}
+
+# =============================================================================
+# SYNTHESIZED RESPONSES - Same shape as api-web.nhle.com, seeded per player id
+# =============================================================================
+
+def player_bio(player):
+    """Deterministic bio fields for a roster entry"""
+    rng = random.Random(player['id'])
+    goalie = player['position'] == 'G'
+    defense = player['position'] == 'D'
+    birth = datetime(1988, 1, 1) + timedelta(days=rng.randrange(0, 365 * 18))
+    return {
+        'heightInInches': rng.randint(73, 78) if goalie or defense else rng.randint(69, 76),
+        'weightInPounds': rng.randint(185, 230) if defense else rng.randint(170, 215),
+        'birthDate': birth.strftime('%Y-%m-%d'),
+        'birthCity': {'default': 'Hometown'},
+        'birthCountry': rng.choice(COUNTRIES),
+        'shootsCatches': rng.choice(['L', 'R']),
+    }
+
+def headshot_url(host, player_id):
+    return f"http://{host}/mugs/{player_id}.png"
+
+def synth_roster(team, host):
+    """/roster/{team}/current"""
+    data = {'forwards': [], 'defensemen': [], 'goalies': []}
+    for player in ROSTER:
+        if player['team'] != team:
+            continue
+        entry = {
+            'id': player['id'],
+            'headshot': headshot_url(host, player['id']),
+            'firstName': {'default': player['first_name']},
+            'lastName': {'default': player['last_name']},
+            'sweaterNumber': player['number'],
+            'positionCode': player['position'],
+            **player_bio(player)
+        }
+        data[POSITION_GROUPS.get(player['position'], 'forwards')].append(entry)
+    return data
+
+def skater_line(rng, games, scoring):
+    goals = int(games * scoring * rng.uniform(0.3, 0.6))
+    assists = int(games * scoring * rng.uniform(0.4, 0.8))
+    return {
+        'gamesPlayed': games, 'goals': goals, 'assists': assists, 'points': goals + assists,
+        'plusMinus': rng.randint(-20, 25), 'pim': rng.randint(0, 80),
+        'shots': max(goals, int(goals / rng.uniform(0.07, 0.16))) if goals else rng.randint(0, games * 2)
+    }
+
+def goalie_line(rng, games):
+    wins = int(games * rng.uniform(0.35, 0.6))
+    losses = int((games - wins) * rng.uniform(0.6, 0.85))
+    return {
+        'gamesPlayed': games, 'wins': wins, 'losses': losses, 'otLosses': games - wins - losses,
+        'goalsAgainstAvg': round(rng.uniform(2.2, 3.6), 2), 'savePctg': round(rng.uniform(0.885, 0.925), 3),
+        'shutouts': rng.randint(0, max(1, games // 15))
+    }
+
+def synth_landing(player_id, host):
+    """/player/{player_id}/landing"""
+    player = next((p for p in ROSTER if p['id'] == player_id), None)
+    if player is None:
+        return None
+    rng = random.Random(player_id * 7919)
+    bio = player_bio(player)
+    age = (datetime.now() - datetime.strptime(bio['birthDate'], '%Y-%m-%d')).days // 365
+    career_games = max(0, (age - 19) * rng.randint(40, 78))
+    season_games = rng.randint(10, 70) if career_games else 0
+    scoring = rng.uniform(0.15, 1.2) if player['position'] != 'D' else rng.uniform(0.1, 0.7)
+
+    if player['position'] == 'G':
+        career, season = goalie_line(rng, career_games), goalie_line(rng, season_games)
+    else:
+        career, season = skater_line(rng, career_games, scoring), skater_line(rng, season_games, scoring)
+        # Keep Sharks consistent with the counts in sharks_edge_data.json
+        edge_season = EDGE.get(str(player_id), {}).get('season_stats')
+        if edge_season:
+            season.update({'gamesPlayed': edge_season['games'], 'goals': edge_season['goals'],
+                           'assists': edge_season['assists'], 'points': edge_season['points'],
+                           'plusMinus': edge_season['plus_minus'], 'pim': edge_season['pim']})
+            season['shots'] = EDGE[str(player_id)].get('shooting', {}).get('shots', season['shots'])
+
+    drafted = rng.random() < 0.85
+    pick = rng.randint(1, 224)
+    city, nickname = TEAM_NAMES.get(player['team'], (player['team'], ''))
+    return {
+        'playerId': player_id,
+        'isActive': True,
+        'currentTeamAbbrev': player['team'],
+        'fullTeamName': {'default': f"{city} {nickname}".strip()},
+        'firstName': {'default': player['first_name']},
+        'lastName': {'default': player['last_name']},
+        'sweaterNumber': player['number'],
+        'position': player['position'],
+        'headshot': headshot_url(host, player_id),
+        **bio,
+        'draftDetails': {
+            'year': datetime.now().year - age + 18,
+            'teamAbbrev': player['team'],
+            'round': (pick - 1) // 32 + 1,
+            'pickInRound': (pick - 1) % 32 + 1,
+            'overallPick': pick
+        } if drafted else {},
+        'featuredStats': {
+            'season': 20252026,
+            'regularSeason': {'subSeason': season, 'career': career}
+        }
+    }
+
+def synth_schedule(team, month):
+    """/club-schedule/{team}/month/{month} - a game every two or three days"""
+    try:
+        start = datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        return None
+    rng = random.Random(f"{team}:{month}")
+    opponents = [abbrev for abbrev in TEAM_NAMES if abbrev != team]
+    games = []
+    day = start + timedelta(days=rng.randint(0, 2))
+    while day.month == start.month:
+        opponent = rng.choice(opponents)
+        home = rng.random() < 0.5
+        home_abbrev, away_abbrev = (team, opponent) if home else (opponent, team)
+        games.append({
+            'id': int(f"2025{len(games):06d}"),
+            'gameDate': day.strftime('%Y-%m-%d'),
+            'startTimeUTC': (day + timedelta(hours=rng.choice([23, 26, 27]))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'venue': {'default': f"{TEAM_NAMES[home_abbrev][0]} Arena"},
+            'homeTeam': {'abbrev': home_abbrev, 'commonName': {'default': TEAM_NAMES[home_abbrev][1]}},
+            'awayTeam': {'abbrev': away_abbrev, 'commonName': {'default': TEAM_NAMES[away_abbrev][1]}},
+            'tvBroadcasts': [{'network': rng.choice(['NBCSCA', 'ESPN+', 'TNT', 'SN'])}],
+            'gameState': 'FUT'
+        })
+        day += timedelta(days=rng.choice([2, 2, 3]))
+    return {'clubTimezone': 'US/Pacific', 'games': games}
+
+def synth_standings():
+    """/standings/now"""
+    return {'standings': [
+        {'teamAbbrev': {'default': abbrev}, 'teamName': {'default': f"{city} {nickname}"},
+         'teamCommonName': {'default': nickname}}
+        for abbrev, (city, nickname) in TEAM_NAMES.items()
+    ]}
+
+# (regex, template name, synthesizer)
+ROUTES = [
+    (re.compile(r'^/v1/roster/(?P<team>[A-Z]{3})/current$'), '/roster/{team}/current',
+     lambda m, host: synth_roster(m['team'], host)),
+    (re.compile(r'^/v1/player/(?P<player_id>\d+)/landing$'), '/player/{player_id}/landing',
+     lambda m, host: synth_landing(int(m['player_id']), host)),
+    (re.compile(r'^/v1/club-schedule/(?P<team>[A-Z]{3})/month/(?P<month>\d{4}-\d{2})$'), '/club-schedule/{team}/month/{month}',
+     lambda m, host: synth_schedule(m['team'], m['month'])),
+    (re.compile(r'^/v1/standings/now$'), '/standings/now',
+     lambda m, host: synth_standings()),
+]
+
+HEADSHOT_ROUTE = re.compile(r'^/mugs/(?P<player_id>\d+)\.png$')
+
+@functools.lru_cache(maxsize=256)
+def placeholder_png(player_id):
+    """A solid-colour PNG seeded by player id (stdlib only - no Pillow needed to run the stub)"""
+    rng = random.Random(player_id)
+    pixel = bytes([rng.randrange(40, 216) for _ in range(3)])
+    row = b'\x00' + pixel * PLACEHOLDER_PIXELS
+    raw = row * PLACEHOLDER_PIXELS
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', PLACEHOLDER_PIXELS, PLACEHOLDER_PIXELS, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+def headshot_png(player_id):
+    """PNG bytes for /mugs/{id}.png: the real Sharks headshot on disk, a placeholder for other rostered ids"""
+    image = os.path.join(HEADSHOT_DIR, f"{player_id}.png")
+    if os.path.exists(image):
+        with open(image, 'rb') as f:
+            return f.read()
+    if player_id in ROSTER_IDS:
+        return placeholder_png(player_id)
+    return None
+
+# =============================================================================
+# HTTP SERVER
+# =============================================================================
+
+def record_stat(template, status):
+    with CONFIG_LOCK:
+        entry = STATS.setdefault(template, {})
+        entry[str(status)] = entry.get(str(status), 0) + 1
+
+def injected_fault():
+    """Sleep for the configured latency; returns an error status to send, or None"""
+    with CONFIG_LOCK:
+        delay = CONFIG['latency_ms'] + RNG.uniform(-CONFIG['jitter_ms'], CONFIG['jitter_ms'])
+        if RNG.random() < CONFIG['slow_rate']:
+            delay += CONFIG['slow_ms']
+        error = CONFIG['error_status'] if RNG.random() < CONFIG['error_rate'] else None
+    if delay > 0:
+        time.sleep(delay / 1000)
+    return error
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # far too noisy under load
+
+    def send_body(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        self.send_body(status, json.dumps(data).encode('utf-8'))
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        host = self.headers.get('Host', f"127.0.0.1:{self.server.server_port}")
+
+        if path == '/__stub/config':
+            with CONFIG_LOCK:
+                return self.send_json(200, dict(CONFIG))
+        if path == '/__stub/stats':
+            with CONFIG_LOCK:
+                return self.send_json(200, json.loads(json.dumps(STATS)))
+
+        match = HEADSHOT_ROUTE.match(path)
+        if match:
+            error = injected_fault()
+            image = None if error else headshot_png(int(match['player_id']))
+            if image is None:
+                record_stat('/mugs/{player_id}.png', error or 404)
+                return self.send_body(error or 404, b'', 'image/png')
+            record_stat('/mugs/{player_id}.png', 200)
+            return self.send_body(200, image, 'image/png')
+
+        for pattern, template, synthesize in ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            error = injected_fault()
+            if error:
+                record_stat(template, error)
+                return self.send_json(error, {'error': 'injected failure'})
+            data = synthesize(match, host)
+            status = 200 if data is not None else 404
+            record_stat(template, status)
+            return self.send_json(status, data if data is not None else {'error': 'not found'})
+
+        record_stat('unmatched', 404)
+        self.send_json(404, {'error': f"No stub for {path}"})
+
+    def do_POST(self):
+        if self.path != '/__stub/config':
+            return self.send_json(404, {'error': 'not found'})
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            updates = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self.send_json(400, {'error': 'invalid JSON'})
+        unknown = set(updates) - set(CONFIG)
+        if unknown:
+            return self.send_json(400, {'error': f"Unknown settings: {', '.join(sorted(unknown))}"})
+        apply_config(updates)
+        with CONFIG_LOCK:
+            self.send_json(200, dict(CONFIG))
+
+def apply_config(updates):
+    """Update fault settings; re-seeds the RNG when a seed is given"""
+    with CONFIG_LOCK:
+        CONFIG.update(updates)
+        if 'seed' in updates:
+            RNG.seed(CONFIG['seed'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline stand-in for the NHL API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--slow-rate', type=float, default=0.0)
+    parser.add_argument('--slow-ms', type=float, default=15000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    load_data()
+    apply_config({
+        'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate, 'error_status': args.error_status,
+        'slow_rate': args.slow_rate, 'slow_ms': args.slow_ms, 'seed': args.seed
+    })
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.daemon_threads = True
+    print(f"NHL stub serving {len(ROSTER)} players on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+"""Latency statistics shared by benchmark.py and loadtest.py.
+
+Kept out of both scripts so loadtest.py doesn't have to import app.py
+(through benchmark.py) just to summarize its samples.
+"""
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
@@ -8,6 +8,9 @@ from datetime import datetime
 
 EDGE_FILE = os.path.join(os.path.dirname(__file__), 'sharks_edge_data.json')
 
+# Same override as app.py - point at nhl_stub_server.py to run offline
+NHL_API_BASE = os.environ.get('NHL_API_BASE', "https://api-web.nhle.com/v1").rstrip('/')
+
 def main():
     # Load existing EDGE data to preserve tracking stats
     with open(EDGE_FILE, 'r') as f:
@@ -16,11 +19,12 @@ def main():
 
     # Fetch current Sharks roster
     print("Fetching Sharks roster...")
-    resp = requests.get("https://api-web.nhle.com/v1/roster/SJS/current", timeout=15)
+    resp = requests.get(f"{NHL_API_BASE}/roster/SJS/current", timeout=15)
     resp.raise_for_status()
     roster_data = resp.json()
 
     all_players = []
+    headshot_urls = {}
     for group in ['forwards', 'defensemen', 'goalies']:
         for p in roster_data.get(group, []):
             pid = p.get('id')
@@ -28,6 +32,7 @@ def main():
             last = p.get('lastName', {}).get('default', '')
             pos = p.get('positionCode', '')
             all_players.append({'id': pid, 'name': f"{first} {last}", 'pos': pos})
+            headshot_urls[pid] = p.get('headshot', '')
 
     print(f"Found {len(all_players)} players on roster")
 
@@ -40,7 +45,7 @@ def main():
 
         print(f"  Fetching stats for {name} ({pid})...")
         try:
-            resp = requests.get(f"https://api-web.nhle.com/v1/player/{pid}/landing", timeout=10)
+            resp = requests.get(f"{NHL_API_BASE}/player/{pid}/landing", timeout=10)
             if resp.status_code != 200:
                 print(f"    Skipped (HTTP {resp.status_code})")
                 continue
@@ -97,6 +102,19 @@ def main():
 
         updated_players[pid] = entry
 
+    # Re-rank shots/goals against a freshly built league table so the percentiles match the live counts
+    import app
+    import build_archetypes
+    print("\nRefreshing the league table...")
+    build_archetypes.build_table()
+    app.load_archetype_table()
+    ranked = app.apply_edge_percentiles(updated_players)
+    if not ranked:
+        # Fresh counts next to snapshot percentiles would contradict each other - write nothing
+        raise SystemExit(f"Could not rank shooting percentiles (NumPy missing or fewer than "
+                         f"{app.EDGE_MIN_LEAGUE_PLAYERS} skaters in the league table) - {EDGE_FILE} not updated")
+    print(f"Recomputed shooting percentiles for {ranked} players")
+
     # Build final output
     output = {
         'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M'),
@@ -108,5 +126,13 @@ def main():
 
     print(f"\nUpdated {len(updated_players)} players. Saved to {EDGE_FILE}")
 
+    # Pick up headshots for new roster ids and rebuild thumbnails + sprite
+    try:
+        import build_headshots
+        if not build_headshots.sync_headshots(headshot_urls):
+            print("Headshot sprite already covers the roster")
+    except ImportError as e:
+        print(f"Skipping headshot sync ({e})")
+
 if __name__ == '__main__':
     main()